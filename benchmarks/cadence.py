@@ -0,0 +1,45 @@
+"""
+DESCRIPTION: Times the watch streak and viewing cadence analytics of the Letterboxd report on synthetic diaries of growing size, to check they stay linear.
+
+USAGE: python -m benchmarks.cadence [--sizes 1000 5000 20000 100000] [--years 15] [--repeat 5]
+"""
+
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.cadence import watch_cadence
+
+
+def synthetic_dates(entries: int, years: int):
+    rng = np.random.default_rng(42)
+    dates = pd.Timestamp("2008-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * years, entries), unit="D"
+    )
+    return pd.Series(dates.strftime("%Y-%m-%d"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20_000, 100_000])
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'best ms':>8} {'longest streak':>15}")
+    for size in args.sizes:
+        dates = synthetic_dates(size, args.years)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            cadence = watch_cadence(dates)
+            timings.append(time.perf_counter() - start)
+        streak = cadence["streaks"]["Days"].iloc[0]
+        print(f"{size:>8} {min(timings) * 1000:>8.1f} {streak:>15}")
+
+
+if __name__ == "__main__":
+    main()
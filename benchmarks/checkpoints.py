@@ -0,0 +1,62 @@
+"""
+DESCRIPTION: Compares the Parquet checkpoints with the CSV checkpoints they replaced, using the sample exports: file size, full load time, and load time of a two column subset.
+
+USAGE: python -m benchmarks.checkpoints [--repeat 20]
+"""
+
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from utils.checkpoints import read_checkpoint, write_checkpoint
+
+SAMPLES = {
+    "goodreads": ("pages/sample-csv/goodreads_export.csv", ["Title", "Number of Pages"]),
+    "letterboxd": ("pages/sample-csv/letterboxd_ratings.csv", ["Name", "Rating"]),
+    "steam": ("pages/sample-csv/steam_export.csv", ["game", "hours"]),
+}
+
+
+def best_of(repeat, func, *args, **kwargs):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'export':<11} {'rows':>5} {'cols':>5} {'csv KB':>8} {'pq KB':>8}"
+        f" {'csv ms':>8} {'pq ms':>8} {'csv 2col':>9} {'pq 2col':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (sample, columns) in SAMPLES.items():
+            df = pd.read_csv(sample, encoding="utf-8", header=0)
+            csv_path = os.path.join(tmp, f"{name}.csv")
+            parquet_path = os.path.join(tmp, f"{name}.parquet")
+            df.to_csv(csv_path, index=False, encoding="utf-8")
+            write_checkpoint(df, parquet_path)
+
+            print(
+                f"{name:<11} {len(df):>5} {len(df.columns):>5}"
+                f" {os.path.getsize(csv_path) / 1024:>8.1f}"
+                f" {os.path.getsize(parquet_path) / 1024:>8.1f}"
+                f" {best_of(args.repeat, pd.read_csv, csv_path, encoding='utf-8'):>8.2f}"
+                f" {best_of(args.repeat, read_checkpoint, parquet_path):>8.2f}"
+                f" {best_of(args.repeat, pd.read_csv, csv_path, usecols=columns):>9.2f}"
+                f" {best_of(args.repeat, read_checkpoint, parquet_path, columns=columns):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
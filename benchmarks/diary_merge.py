@@ -0,0 +1,68 @@
+"""
+DESCRIPTION: Times the (Name, Year) diary/ratings join of the Letterboxd report on a synthetic diary with rewatches, against the row-by-row loop it replaced.
+
+USAGE: python -m benchmarks.diary_merge [--diary 50000] [--ratings 5000] [--skip-loop]
+"""
+
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.letterboxd import merge_diary
+
+
+def iterrows_merge(ratings_df: pd.DataFrame, diary_df: pd.DataFrame):
+    # the previous implementation, kept here as the baseline
+    movie_df = ratings_df.copy()
+    movie_df["Watched Date"] = ""
+    for index, row in movie_df.iterrows():
+        if row["Name"] in diary_df["Name"].values:
+            movie_df.loc[index, "Watched Date"] = diary_df.loc[
+                diary_df["Name"] == row["Name"], "Watched Date"
+            ].values[0]
+    return movie_df
+
+
+def synthetic_exports(diary_rows: int, ratings_rows: int):
+    rng = np.random.default_rng(42)
+    films = pd.DataFrame(
+        {
+            "Name": [f"Film {i}" for i in range(ratings_rows)],
+            "Year": rng.integers(1920, 2023, ratings_rows),
+        }
+    )
+    ratings_df = films.assign(Rating=rng.integers(1, 11, ratings_rows) / 2)
+    picks = rng.integers(0, ratings_rows, diary_rows)
+    dates = pd.Timestamp("2010-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 13, diary_rows), unit="D"
+    )
+    diary_df = films.iloc[picks].reset_index(drop=True)
+    diary_df["Watched Date"] = dates.strftime("%Y-%m-%d")
+    return ratings_df, diary_df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--diary", type=int, default=50_000)
+    parser.add_argument("--ratings", type=int, default=5_000)
+    parser.add_argument("--skip-loop", action="store_true")
+    args = parser.parse_args()
+
+    ratings_df, diary_df = synthetic_exports(args.diary, args.ratings)
+    print(f"{len(diary_df)} diary entries, {len(ratings_df)} rated films")
+    print(f"merge_diary:    {timed(merge_diary, ratings_df, diary_df):.3f}s")
+    if not args.skip_loop:
+        print(f"iterrows merge: {timed(iterrows_merge, ratings_df, diary_df):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
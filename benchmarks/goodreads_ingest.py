@@ -0,0 +1,94 @@
+"""
+DESCRIPTION: Compares the typed, chunked Goodreads ingest with the eager read it replaced (every column of the export read as inferred types, then cleaned) on a synthetic export built by resampling the sample export: load time and peak memory. Every load runs in a fresh process so its peak RSS is its own.
+
+USAGE: python -m benchmarks.goodreads_ingest [--rows 200000] [--chunksize 50000] [--repeat 3]
+"""
+
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from utils.goodreads import COLUMNS, read_export
+
+SAMPLE = "pages/sample-csv/goodreads_export.csv"
+
+
+def synthetic_export(path: str, rows: int):
+    sample = pd.read_csv(SAMPLE, encoding="utf-8", header=0)
+    export = sample.sample(rows, replace=True, random_state=42, ignore_index=True)
+    # books of a real library are distinct, and pandas shares equal strings it parses
+    suffix = pd.Series(range(rows)).astype(str)
+    export["Title"] = export["Title"] + " " + suffix
+    export["ISBN13"] = '="' + (9_780_000_000_000 + export.index).astype(str) + '"'
+    export["My Review"] = export["My Review"].where(export["My Review"].isna(), export["My Review"] + suffix)
+    export.to_csv(path, index=False)
+
+
+def eager_load(path: str, chunksize: int):
+    books_df = pd.read_csv(path, encoding="utf-8", header=0)[COLUMNS].copy()
+    books_df["Date Read"] = pd.to_datetime(books_df["Date Read"])
+    books_df["Year"] = books_df["Date Read"].dt.year
+    books_df = books_df.dropna(how="all", axis=0)
+    books_df["Title"] = books_df["Title"].str.split("(", n=1, expand=True)[0]
+    books_df = books_df[books_df["Exclusive Shelf"] == "read"]
+    books_df = books_df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    books_df["ISBN13"] = books_df["ISBN13"].str[2:-1]
+    return books_df
+
+
+def chunked_load(path: str, chunksize: int):
+    return read_export(path, chunksize=chunksize)
+
+
+LOADERS = {"eager": eager_load, "chunked": chunked_load}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)  # bytes on macOS, KB elsewhere
+
+
+def measure(loader: str, path: str, chunksize: int):
+    # peak RSS of this process after the imports, then after the load
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    books_df = LOADERS[loader](path, chunksize)
+    elapsed = time.perf_counter() - start
+    result_mb = books_df.memory_usage(deep=True).sum() / 1024 / 1024
+    return elapsed, peak_rss_mb() - baseline, result_mb
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "goodreads_export.csv")
+        # built in a child too, a child starts from the peak RSS of the process it forked from
+        with context.Pool(1) as pool:
+            pool.apply(synthetic_export, (path, args.rows))
+        print(f"{args.rows} rows, {os.path.getsize(path) / 1024 / 1024:.1f} MB CSV")
+        print(f"{'loader':<8} {'best s':>7} {'peak MB':>8} {'frame MB':>9}")
+        for loader in LOADERS:
+            runs = []
+            for _ in range(args.repeat):
+                with context.Pool(1) as pool:
+                    runs.append(pool.apply(measure, (loader, path, args.chunksize)))
+            elapsed = min(run[0] for run in runs)
+            peak = min(run[1] for run in runs)
+            print(f"{loader:<8} {elapsed:>7.2f} {peak:>8.1f} {runs[0][2]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+DESCRIPTION: Shows how the wall-clock time of the Letterboxd OMDB enrichment scales with the number of workers. OMDB is replaced by an in-process session with a fixed latency so the numbers do not spend any API quota.
+
+USAGE: python -m benchmarks.omdb_enrichment [--movies 200] [--latency 0.25] [--rate 50]
+"""
+
+
+import argparse
+import time
+
+import pandas as pd
+
+from utils.omdb import OMDB_FIELDS, OMDBClient, enrich_movies
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, params):
+        self.params = params
+
+    def json(self):
+        response = {field: "N/A" for field in OMDB_FIELDS}
+        response.update({"Title": self.params["t"], "Response": "True"})
+        return response
+
+
+class FakeSession:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def get(self, url, params=None, timeout=None):
+        time.sleep(self.latency)
+        return FakeResponse(params)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--rate", type=float, default=50)
+    args = parser.parse_args()
+
+    movie_df = pd.read_csv("pages/sample-csv/letterboxd_ratings.csv").head(args.movies)
+    session = FakeSession(args.latency)
+
+    print(f"{len(movie_df)} movies, {args.latency}s latency, {args.rate} req/s limit")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+    baseline = None
+    for workers in (1, 2, 4, 8, 16):
+        start = time.perf_counter()
+        client = OMDBClient("benchmark", workers=workers, rate=args.rate)
+        client.session = session
+        enrich_movies(movie_df, client)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
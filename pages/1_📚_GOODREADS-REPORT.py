@@ -9,47 +9,42 @@ API KEYS: None
 """
 
 
-import calendar
-import os
-from datetime import datetime
 from functools import wraps
 
 import altair as alt
 import numpy as np
 import pandas as pd
 import plotly.express as px
-import requests
 import streamlit as st
-from wordcloud import WordCloud
 
+from utils.aggregations import bucket_long_tail
+from utils.checkpoints import upload_checkpoint, upload_digest
+from utils.covers import DEFAULT_COVER, CoverCache, resolve_covers
+from utils.goodreads import (
+    ALL,
+    author_cube,
+    book_highlights,
+    books_per_year,
+    library_totals,
+    missing_columns,
+    monthly_pages,
+    page_range_counts,
+    publication_years,
+    rated_books,
+    read_export,
+    rating_counts,
+    reading_cube,
+    top_authors,
+    yearly_totals,
+)
+from utils.memo import memoize_section
+from utils.title_cloud import submit_cloud, title_frequencies
 
 # #######################
 # # DATA CLEANUP START #
 # #######################
-def cleanup_dataframe(books_df: pd.DataFrame):
-    books_df = books_df.dropna(how="all", axis=0)  # check for null values and drop them
-    books_df["Title"] = books_df["Title"].str.split("(", n=1, expand=True)[
-        0
-    ]  # split the title on the first occurence of ( and take the first part
-    books_df = books_df[
-        books_df["Exclusive Shelf"] == "read"
-    ]  # filter out rows where exclusive shelf value == read
-    books_df = books_df.apply(
-        lambda x: x.str.strip() if x.dtype == "object" else x
-    )  # strip whitespaces from all rows
-    books_df["ISBN13"] = books_df["ISBN13"].str[
-        2:-1
-    ]  # strip first two and last one characters from ISBN13 and convert to int
-
-    # check if csvs folder exists
-    if not os.path.exists("csvs"):
-        os.mkdir("csvs")
-        if not os.path.exists("csvs/goodreads"):
-            os.mkdir("csvs/goodreads")
-
-    books_df.to_csv(
-        "csvs/goodreads/CHECKPOINT1.csv", index=False, encoding="utf-8"
-    )  # write the dataframe to a csv file
+def cleanup_dataframe(uploaded_file):
+    return read_export(uploaded_file)  # checkpointed as Parquet, dtypes and categories are kept
 
 
 # #######################
@@ -67,48 +62,40 @@ def add_seperator(func):
     return wrapper
 
 
-def get_book_cover(bookISBN):
-    bookISBN = bookISBN[:-2]
-    book_cover = f"https://covers.openlibrary.org/b/isbn/{bookISBN}-L.jpg"
-    if len(bookISBN) == 13 and len(requests.get(book_cover).content) > 1000:
-        return book_cover
-    else:
-        return "https://islandpress.org/sites/default/files/default_book_cover_2015.jpg"
+def book_cover(covers: dict, isbn):
+    # Open Library has no cover for some ISBNs, fall back to a generic one
+    return covers.get(isbn) or DEFAULT_COVER
 
 
 @add_seperator
+@memoize_section
 def general_stats(books_df: pd.DataFrame):
     st.markdown("---")
+    totals = library_totals(books_df)
     col1, col2, col3 = st.columns(3)
     with col1:
         st.header("Total :blue[Books] Read")
-        st.markdown(f"## {len(books_df)}")
+        st.markdown(f"## {totals['books']}")
     with col2:
         st.header("Total :green[Pages] Read")
-        st.markdown(f"## {books_df['Number of Pages'].sum().astype(int)}")
+        st.markdown(f"## {totals['pages']}")
     with col3:
         st.header("Total :red[Authors] Read")
-        st.markdown(f"## {len(books_df['Author'].unique())}")
+        st.markdown(f"## {totals['authors']}")
     col1, col2, col3 = st.columns(3)
 
 
 @add_seperator
+@memoize_section
 def total_books_by_year(books_df: pd.DataFrame):
     st.header("Total Books Read by Year 🗓️")
-    books_by_year = books_df["Year"].value_counts()
-
-    books_by_year = books_by_year[books_by_year.index != ""]
-    books_by_year = books_by_year.sort_index().astype(int)
-
-    books_by_year_df = pd.DataFrame(books_by_year)
-    books_by_year_df = books_by_year_df.reset_index()
-    books_by_year_df.columns = ["Year", "Count"]
+    books_by_year_df = books_per_year(books_df)
 
     st.success(
-        f"🚀 Your read most books read in **{books_by_year_df['Year'].max().astype(int)}**! Totalling to {books_by_year_df['Count'].max()} books"
+        f"🚀 Your read most books read in **{books_by_year_df['Year'].max()}**! Totalling to {books_by_year_df['Count'].max()} books"
     )
     st.error(
-        f"📉 You read the least books in **{books_by_year_df['Year'].min().astype(int)}**! Totalling to {books_by_year_df['Count'].min()} books"
+        f"📉 You read the least books in **{books_by_year_df['Year'].min()}**! Totalling to {books_by_year_df['Count'].min()} books"
     )
 
     st.dataframe(books_by_year_df)
@@ -116,322 +103,146 @@ def total_books_by_year(books_df: pd.DataFrame):
     st.plotly_chart(ff, use_container_width=True)
 
 @add_seperator
-def top_N_authors(books_df: pd.DataFrame, num_authors: int, genre: str, year: int):
-    # for all genres and all years
-    if genre == "All" and year == "All":
-        st.markdown(f"### Top {num_authors} Authors")
-        author_count = books_df[
-            "Author"
-        ].value_counts()  # count the number of books read by each author
-        author_count = author_count[author_count > 1]
-
-        if author_count.empty or len(author_count) < num_authors:
-            st.error("Not enough authors to in your library")
-        else:
-
-            chart = (
-                alt.Chart(author_count.head(num_authors).reset_index())
-                .mark_bar()
-                .encode(x=alt.X("index", sort="-y"), y="Author", color="Author")
-            )
-            st.altair_chart(chart, use_container_width=True)
-
-    # for specific genre and all years
-    if genre != "All" and year == "All":
-        st.markdown(f"### Top {num_authors} Authors in {genre.upper()} bookshelf")
-        author_count = books_df[books_df["Bookshelves"] == genre][
-            "Author"
-        ].value_counts()  # count the number of books read by each author
-        author_count = author_count[author_count > 1]
-        if author_count.empty or len(author_count) < num_authors:
-            st.error("Not enough authors to display for the given genre")
+@memoize_section
+def top_N_authors(authors: pd.Series, num_authors: int, genre: str, year: str):
+    title = f"### Top {num_authors} Authors"
+    scope = []
+    if genre != "All":
+        title += f" in {genre.upper()} bookshelf"
+        scope.append("genre")
+    if year != "All":
+        title += f" in {year}"
+        scope.append("year")
+    st.markdown(title)
+
+    # a lookup in the precomputed shelf x year x author counts, no pass over the books
+    author_count = top_authors(authors, genre, year, num_authors)
+    if len(author_count) < num_authors:
+        if scope:
+            st.error(f"Not enough authors to display for the given {' and '.join(scope)}")
         else:
-            chart = (
-                alt.Chart(author_count.head(num_authors).reset_index())
-                .mark_bar()
-                .encode(x=alt.X("index", sort="-y"), y="Author", color="Author")
-            )
-            st.altair_chart(chart, use_container_width=True)
-
-    # for all genres and specific year
-    if year != "All" and genre == "All":
-        st.markdown(f"### Top {num_authors} Authors in {year}")
-        author_count = books_df[books_df["Year"] == year][
-            "Author"
-        ].value_counts()  # count the number of books read by each author
-        author_count = author_count[author_count > 1]
-        if author_count.empty or len(author_count) < num_authors:
-            st.error("Not enough authors to display for the given year")
-        else:
-            chart = (
-                alt.Chart(author_count.head(num_authors).reset_index())
-                .mark_bar()
-                .encode(x=alt.X("index", sort="-y"), y="Author", color="Author")
-            )
-            st.altair_chart(chart, use_container_width=True)
-
-    # for specific genre and specific year
-    if year != "All" and genre != "All":
-        st.markdown(f"### Top Authors in {genre.upper()} bookshelf in {year}")
-        author_count = books_df[
-            (books_df["Year"] == year) & (books_df["Bookshelves"] == genre)
-        ]["Author"].value_counts()
-        author_count = author_count[author_count > 1]
-        if author_count.empty or len(author_count) < num_authors:
-            st.error("Not enough authors to display for the given year and genre")
-        else:
-            chart = (
-                alt.Chart(author_count.head(num_authors).reset_index())
-                .mark_bar()
-                .encode(x=alt.X("index", sort="-y"), y="Author", color="Author")
-            )
-            st.altair_chart(chart, use_container_width=True)
+            st.error("Not enough authors in your library")
+    else:
+        chart = (
+            alt.Chart(author_count.rename_axis("Author").reset_index(name="Books"))
+            .mark_bar()
+            .encode(x=alt.X("Author", sort="-y"), y="Books", color="Books")
+        )
+        st.altair_chart(chart, use_container_width=True)
 
 
 @add_seperator
+@memoize_section
 def top_N_rated_books(books_df: pd.DataFrame, N: int):
-    books_df = books_df[books_df["My Rating"] > 0]
-    books_df = books_df[
-        ["Title", "Author", "My Rating", "Average Rating"]
-    ]  # store only the columns we are interested in
-    books_df = books_df.sort_values(
-        by=["My Rating", "Average Rating"], ascending=False
-    )  # sort the dataframe by My Rating and Average Rating
-    books_df = books_df.set_index("Title")
     st.markdown(f"### Top {N} Rated Books")
-    st.dataframe(books_df.head(N), use_container_width=True)
+    st.dataframe(rated_books(books_df, N, best=True), use_container_width=True)
 
 
 @add_seperator
+@memoize_section
 def bottom_N_rated_books(books_df: pd.DataFrame, N: int):
-    books_df = books_df[books_df["My Rating"] > 0]
-    books_df = books_df[["Title", "Author", "My Rating", "Average Rating"]]
-    books_df = books_df.sort_values(by=["My Rating", "Average Rating"], ascending=True)
-    books_df = books_df.set_index("Title")
     st.markdown(f"### Bottom {N} Rated Books")
-    st.dataframe(books_df.head(N), use_container_width=True)
+    st.dataframe(rated_books(books_df, N, best=False), use_container_width=True)
 
 
 @add_seperator
-def total_pages_per_year(books_df: pd.DataFrame):
-    books_df = books_df[books_df["Year"] != ""]  # drop all nans
-    books_df = books_df.dropna()
-    books_df["Year"] = books_df["Year"].astype(int)
-    books_df = (
-        books_df.groupby("Year").sum().astype(int)
-    )  # sum the number of pages read per year
-    books_df = books_df["Number of Pages"]
-    st.line_chart(books_df, y="Number of Pages")
+@memoize_section
+def total_pages_per_year(cube: pd.DataFrame):
+    # sum the number of pages read per year
+    st.line_chart(yearly_totals(cube)["Number of Pages"], y="Number of Pages")
 
 
 @add_seperator
-def average_rating_per_year(books_df: pd.DataFrame):
-    books_df = books_df[books_df["Year"] != ""]
-    books_df = books_df.dropna()
-    books_df["Year"] = books_df["Year"].astype(int)
-    books_df = books_df.groupby("Year").mean()
-    books_df = books_df["Average Rating"]
-    st.line_chart(books_df, y="Average Rating")
+@memoize_section
+def average_rating_per_year(cube: pd.DataFrame):
+    st.line_chart(yearly_totals(cube)["Average Rating"], y="Average Rating")
 
 
 @add_seperator
-def pages_read_per_month(books_df: pd.DataFrame):
+@memoize_section
+def pages_read_per_month(cube: pd.DataFrame):
     st.markdown("### Pages Read per Month (Yearly Comparison)")
-    books_df = books_df[books_df["Year"] != ""]
-    books_df = books_df.dropna()  # drop all nans
-    books_df["Month"] = books_df["Date Read"].apply(lambda x: x.split("-")[1])
-    books_df = books_df[
-        ["Number of Pages", "Year", "Month"]
-    ]  # keep only pages, year and month
-    months = [
-        "01",
-        "02",
-        "03",
-        "04",
-        "05",
-        "06",
-        "07",
-        "08",
-        "09",
-        "10",
-        "11",
-        "12",
-    ]  # add rows for months that are not present in the dataset and set the number of pages to 0
-    years = books_df["Year"].unique()
-    for year in years:
-        for month in months:
-            if month not in books_df[books_df["Year"] == year]["Month"].unique():
-                books_df = books_df.append(
-                    {"Number of Pages": 0, "Year": year, "Month": month},
-                    ignore_index=True,
-                )
-
-    grouped = books_df.groupby(["Year", "Month"]).agg(
-        {"Number of Pages": "sum"}
-    )  # Group the data by year and month and sum the number of pages read
-    grouped = (
-        grouped.reset_index()
-    )  # change the x axis values to add month name next to the month number
-    grouped["Month"] = grouped["Month"].apply(
-        lambda x: f"{str(x)}-" + calendar.month_name[int(x)]
-    )
+    # every month of every year is in the cube, months without a book read are 0
+    grouped = monthly_pages(cube)
 
     # plot the altair chart with x as month and y as number of pages with a line for each year in the multi-series line chart
     st.altair_chart(
-        alt.Chart(grouped.reset_index())
+        alt.Chart(grouped)
         .mark_line()
         .encode(
             x="Month",
             y="Number of Pages",
-            color="Year",
+            color="Year:N",
             tooltip=["Year", "Month", "Number of Pages"],
         )
         .interactive(),
         use_container_width=True,
         theme="streamlit",
     )
-    # st.write(grouped)
-
-
-@add_seperator
-def general_stats_2(books_df: pd.DataFrame):
-    col1, col2, col3, col4 = st.columns(4, gap="large")
-    with col1:
-        st.header(":blue[Oldest] Book Read")
-        books_df1 = books_df[["Title", "Original Publication Year"]]
-        books_df1 = books_df.sort_values(
-            by=["Original Publication Year"], ascending=True, ignore_index=True
-        )  # sort the dataframe by My Rating and Average Rating
-        oldest = books_df1["Title"][0]
-        oldest_pub_year = books_df1["Original Publication Year"][0].astype(int)
-        st.markdown(f"### {oldest}")
-        st.markdown(f"Published ***{oldest_pub_year}***")
-
-    with col2:
-        isbn = str(books_df[books_df["Title"] == oldest]["ISBN13"].values[0])
-        image = get_book_cover(isbn)
-        st.image(image, width=150)
-
-    with col3:
-        st.header(":green[Newest] Book Read")
-        books_df2 = books_df[["Title", "Original Publication Year"]]
-        books_df2 = books_df.sort_values(
-            by=["Original Publication Year"], ascending=False, ignore_index=True
-        )  # sort reverse by Original Publication Year
-        newest = books_df2["Title"][0]
-        newest_pub_year = books_df2["Original Publication Year"][0].astype(int)
-        st.markdown(f"### {newest}")
-        st.markdown(f"Published ***{newest_pub_year}***")
-
-    with col4:
-
-        isbn = str(books_df[books_df["Title"] == newest]["ISBN13"].values[0])
-        image = get_book_cover(isbn)
-        st.image(image, width=150)
-    st.markdown("---")
-    col1, col2, col3, col4 = st.columns(4, gap="large")
-    with col1:
-        st.header(":red[First] Book Read")
-        books_df3 = books_df[["Title", "Author", "Date Read"]]
-        books_df3 = books_df3.sort_values(
-            by=["Date Read"], ascending=True, ignore_index=True
-        )  # sort the dataframe by Date Read
-        first = books_df3.loc[0, "Title"]
-        date_of_first = books_df3["Date Read"][0]
-        date_of_first = datetime.strptime(date_of_first, "%Y-%m-%d").strftime(
-            "%B %d, %Y"
-        )
-        st.markdown(f"### {first}")
-        st.markdown(f"Read on ***{date_of_first}***")
-
-    with col2:
-        isbn = str(books_df[books_df["Title"] == first]["ISBN13"].values[0])
-        image = get_book_cover(isbn)
-        st.image(image, width=150)
 
-    with col3:
-        st.header(":violet[Last] Book Read")
-        books_df4 = books_df[["Title", "Author", "Date Read"]]
-        books_df4 = books_df4.sort_values(
-            by=["Date Read"], ascending=False, ignore_index=True
-        )  # sort the dataframe by My Rating and Average Rating
-        last = books_df4.loc[0, "Title"]
-        date_of_last = books_df4["Date Read"][0]
-        date_of_last = datetime.strptime(date_of_last, "%Y-%m-%d").strftime("%B %d, %Y")
-        st.markdown(f"### {last}")
-        st.markdown(f"Read on ***{date_of_last}***")
-
-    with col4:
-        isbn = str(books_df[books_df["Title"] == last]["ISBN13"].values[0])
-        image = get_book_cover(isbn)
-        st.image(image, width=150)
-
-    st.markdown("---")
-    col1, col2, col3, col4 = st.columns(4, gap="large")
-    with col1:
-        st.header(":orange[Longest] Book Read")
-        books_df5 = books_df[["Title", "Author", "Number of Pages"]]
-        books_df5 = books_df5.sort_values(
-            by=["Number of Pages"], ascending=False, ignore_index=True
-        )  # sort the dataframe by Number of Pages
-        longest = books_df5.loc[0, "Title"]
-        longest_pages = books_df5["Number of Pages"][0].astype(int)
-        st.markdown(f"### {longest}")
-        st.markdown(f"A whopping ***{longest_pages}*** pages")
-
-    with col2:
-        isbn = str(books_df[books_df["Title"] == longest]["ISBN13"].values[0])
-        image = get_book_cover(isbn)
-        st.image(image, width=150)
-
-    with col3:
-        st.header(":green[Shortest] Book Read")
-        books_df6 = books_df[["Title", "Author", "Number of Pages"]]
-        books_df6 = books_df6.sort_values(
-            by=["Number of Pages"], ascending=True, ignore_index=True
-        )
-        shortest = books_df6.loc[0, "Title"]
-        shortest_pages = books_df6["Number of Pages"][0].astype(int)
-        st.markdown(f"### {shortest}")
-        st.markdown(f"A mere ***{shortest_pages}*** pages")
 
-    with col4:
-        isbn = str(books_df[books_df["Title"] == shortest]["ISBN13"].values[0])
-        image = get_book_cover(isbn)
-        st.image(image, width=150)
+# rows of the highlight section: (highlight, header, caption, column shown in the caption)
+HIGHLIGHT_ROWS = [
+    [
+        ("oldest", ":blue[Oldest] Book Read", "Published ***{:.0f}***", "Original Publication Year"),
+        ("newest", ":green[Newest] Book Read", "Published ***{:.0f}***", "Original Publication Year"),
+    ],
+    [
+        ("first", ":red[First] Book Read", "Read on ***{:%B %d, %Y}***", "Date Read"),
+        ("last", ":violet[Last] Book Read", "Read on ***{:%B %d, %Y}***", "Date Read"),
+    ],
+    [
+        ("longest", ":orange[Longest] Book Read", "A whopping ***{:.0f}*** pages", "Number of Pages"),
+        ("shortest", ":green[Shortest] Book Read", "A mere ***{:.0f}*** pages", "Number of Pages"),
+    ],
+]
 
 
+@add_seperator
+@memoize_section
+def general_stats_2(highlights: dict, covers: dict):
+    for position, row in enumerate(HIGHLIGHT_ROWS):
+        if position:
+            st.markdown("---")
+        columns = st.columns(4, gap="large")
+        # a text column followed by a cover column for every book of the row
+        for (name, header, caption, column), text_col, cover_col in zip(
+            row, columns[::2], columns[1::2]
+        ):
+            if name not in highlights:
+                continue
+            book = highlights[name]
+            with text_col:
+                st.header(header)
+                st.markdown(f"### {book['Title']}")
+                st.markdown(caption.format(book[column]))
+            with cover_col:
+                st.image(book_cover(covers, book["ISBN13"]), width=150)
+
+
+@memoize_section
 def top_10_publishers(books_df: pd.DataFrame):
     st.header("Top 10 :blue[Publishers]")
     st.info("Click on the legend to hide/show the publisher")
-    publisher_count = books_df["Publisher"].value_counts()
-    publisher_count = publisher_count[publisher_count > 1]
+    # the 10 biggest publishers, everyone else summed up as 'Others'
+    publisher_count = bucket_long_tail(books_df["Publisher"].value_counts(), top_k=10)
     publisher_count.index.name = "Publisher"
     publisher_count.name = "Count"
-    if len(publisher_count) >= 10:
-        fig = px.pie(
-            publisher_count.head(10),
-            values="Count",
-            names=publisher_count.head(10).index,
-            labels={"Count": "Number of Books", "index": "Publisher"},
-        )
-
-    else:
-        fig = px.pie(
-            publisher_count,
-            values="Count",
-            names=publisher_count.index,
-            labels={"Count": "Number of Books", "index": "Publisher"},
-        )
+    fig = px.pie(
+        publisher_count,
+        values="Count",
+        names=publisher_count.index,
+        labels={"Count": "Number of Books", "index": "Publisher"},
+    )
 
     st.plotly_chart(fig)
 
 
+@memoize_section
 def top_bindings(books_df: pd.DataFrame):
     st.header("Top 10 :blue[Bindings]")
     st.info("Click on the legend to hide/show types")
-    binding_count = books_df["Binding"].value_counts()
-    binding_count = binding_count[binding_count > 1]
+    binding_count = bucket_long_tail(books_df["Binding"].value_counts(), top_k=10)
     fig = px.pie(
         binding_count,
         values="Binding",
@@ -441,16 +252,10 @@ def top_bindings(books_df: pd.DataFrame):
     st.plotly_chart(fig)
 
 #TODO: DEBUG
+@memoize_section
 def rating_distribution(books_df: pd.DataFrame):
     st.header("Rating Distribution")
-    rating_count = books_df["My Rating"].value_counts().reset_index()
-    rating_count.columns = ["Rating", "Count"]
-
-    # remove ratings with 0 count
-    rating_count = rating_count[rating_count["Count"] > 0]
-
-    # remove rating 0
-    rating_count = rating_count[rating_count["Rating"] > 0]
+    rating_count = rating_counts(books_df)
 
     # Define custom color scheme
     color_scale = alt.Scale(
@@ -476,6 +281,7 @@ def rating_distribution(books_df: pd.DataFrame):
     st.altair_chart(chart, use_container_width=True)
 
 
+@memoize_section
 def rating_vs_average_rating(books_df: pd.DataFrame):
     # Comparison of your ratings vs. average ratings
     # Scatter plot showing your ratings vs. the average ratings of the books you've read.
@@ -509,15 +315,13 @@ def rating_vs_average_rating(books_df: pd.DataFrame):
 
 
 @add_seperator
+@memoize_section
 def publication_year_distribution(books_df: pd.DataFrame):
     # Histogram or bar chart showing the number of books you've read published in each year.
     st.header(":bar_chart: Publication Year Distribution")
 
     # Filter out books with no publication year or invalid publication year
-    books_df = books_df[
-        (books_df["Original Publication Year"].notna())
-        & (books_df["Original Publication Year"] > 0)
-    ]
+    books_df = publication_years(books_df)
 
     # Create a histogram using Plotly
     fig = px.histogram(
@@ -544,17 +348,11 @@ def publication_year_distribution(books_df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=True)
 
 
+@memoize_section
 def distribution_of_book_length(books_df: pd.DataFrame):
     st.header("Book Length Distribution")
     st.info("Click on the legend to hide/show book length ranges")
-    books_df = books_df[books_df["Number of Pages"] > 0]
-    bins = [0, 100, 500, 1000, float("inf")]
-    labels = ["<100", "100-500", "500-1000", ">1000"]
-    books_df["Page Ranges"] = pd.cut(
-        books_df["Number of Pages"], bins=bins, labels=labels
-    )
-    page_count = books_df["Page Ranges"].value_counts().reset_index()
-    page_count.columns = ["Page Ranges", "Count"]
+    page_count = page_range_counts(books_df)
 
     # Create a pie chart using Plotly
     fig = px.pie(
@@ -567,21 +365,10 @@ def distribution_of_book_length(books_df: pd.DataFrame):
     st.plotly_chart(fig)
 
 
-def book_title_word_cloud(books_df: pd.DataFrame):
+@memoize_section
+def book_title_word_cloud(cloud: np.ndarray):
     st.header("Title Word Cloud")
-    books_df = books_df[books_df["Title"].notna()]
-    titles = " ".join(books_df["Title"])
-
-    wordcloud = WordCloud(
-        background_color="white",
-        width=800,
-        height=500,
-        max_words=100,
-        max_font_size=100,
-        random_state=42,
-    ).generate(titles)
-
-    st.image(wordcloud.to_array())
+    st.image(cloud, use_column_width=True)
 
 
 # #########################
@@ -599,6 +386,9 @@ st.set_page_config(
 # TITLE
 st.title(":blue[Goodreads] Reading Analysis :book:")
 
+# Open Library cover checks, missing covers included, are kept on disk and shared by every session
+cover_cache = CoverCache()
+
 # INTRO
 st.markdown(
     """   
@@ -652,37 +442,34 @@ uploaded_file = st.file_uploader(
 if uploaded_file is not None or just_show_me_the_app:
     if just_show_me_the_app:
         uploaded_file = "pages/sample-csv/goodreads_export.csv"
-    books_df = pd.read_csv(uploaded_file, encoding="utf-8", header=0)
-
-    # check if dataframe is valid by checking for columns
-    cols_to_check = [
-        "Title",
-        "Author",
-        "My Rating",
-        "Average Rating",
-        "Publisher",
-        "Binding",
-        "Number of Pages",
-        "Original Publication Year",
-        "Date Read",
-        "Bookshelves",
-        "Exclusive Shelf",
-        "ISBN13",
-    ]
-
-    if set(cols_to_check).issubset(set(books_df.columns)):
-        st.success("File Uploaded Successfully! Proceeding to Data Analysis.")
-        books_df = books_df[cols_to_check]
 
-        # get the year from the the Date Read column
-        books_df["Date Read"] = pd.to_datetime(books_df["Date Read"])
-        books_df["Year"] = books_df["Date Read"].dt.year
+    # check if the export is valid by checking the columns of its header
+    if not missing_columns(uploaded_file):
+        st.success("File Uploaded Successfully! Proceeding to Data Analysis.")
 
-        # check if csvs/goodreads folder exists and file CHECKPOINT1.csv exists, if not then run cleanup_dataframe
-        if not os.path.exists("csvs/goodreads/CHECKPOINT1.csv"):
-            cleanup_dataframe(books_df)
-        books_df = pd.read_csv(
-            "csvs/goodreads/CHECKPOINT1.csv", encoding="utf-8", header=0
+        # the checkpoint of this exact upload, read and cleaned the first time it is seen
+        export_id = upload_digest(uploaded_file)
+        books_df = upload_checkpoint(
+            "goodreads", export_id, lambda: cleanup_dataframe(uploaded_file)
+        )
+        # books, pages and ratings per (year, month), the monthly and yearly charts share it
+        cube = reading_cube(books_df)
+
+        # books per shelf, year and author, kept for the session so the author filters
+        # below only look counts up in it
+        authors_key = f"goodreads_authors_{export_id}"
+        if authors_key not in st.session_state:
+            st.session_state[authors_key] = author_cube(books_df)
+        authors = st.session_state[authors_key]
+
+        # the title word cloud is laid out in the background while the sections above it
+        # are drawn, from word counts tokenized once per upload
+        titles_key = f"goodreads_title_words_{export_id}"
+        if titles_key not in st.session_state:
+            st.session_state[titles_key] = title_frequencies(books_df["Title"])
+        cloud = submit_cloud(
+            st.session_state[titles_key],
+            preview=st.session_state.get("preview_cloud", False),
         )
 
         # st.header("Data Preview")
@@ -739,25 +526,27 @@ if uploaded_file is not None or just_show_me_the_app:
                 label="Filter by Shelf", options=["All"] + genres, index=0
             )
         with col3:
-            books_df["Year"] = books_df["Date Read"].str.split("-", n=1, expand=True)[
-                0
-            ]  # show a dropdown by year of reading
-            years = books_df["Year"].unique()
-            years = years[~pd.isnull(years)]  # drop all rows with NaN values
+            # show a dropdown by year of reading, the years of the author counts
+            years = authors.index.unique(level="Year").difference(["", ALL])
             # sort the numpy years in descending order
-            years = np.sort(years)[::-1]
+            years = np.sort(years.to_numpy())[::-1]
             years = np.insert(years, 0, "All")  # add a 'All' as first option
             year = st.selectbox(
                 label="Filter by Year", options=years, index=0, key="totalbooksbyyear"
             )
 
-        top_N_authors(books_df, num_authors, genre, year)
+        top_N_authors(authors, num_authors, genre, year)
 
         # MONTH WISE STATS
         st.header("Month-Wise Reading Trend 📚")
-        pages_read_per_month(books_df)
+        pages_read_per_month(cube)
 
-        general_stats_2(books_df)
+        # the six highlighted books, with their covers checked together (once per ISBN, on disk)
+        highlights = book_highlights(books_df)
+        covers = resolve_covers(
+            [book["ISBN13"] for book in highlights.values()], cover_cache
+        )
+        general_stats_2(highlights, covers)
 
         # PUBLISHER, RATING DISTRIBUTION AND BINDING STATS
         publisher_count = len(books_df["Publisher"].unique())
@@ -774,10 +563,10 @@ if uploaded_file is not None or just_show_me_the_app:
         col1, col2 = st.columns(2, gap="large")
         with col1:
             st.header("Total Pages Read Per Year 📖")
-            total_pages_per_year(books_df)
+            total_pages_per_year(cube)
         with col2:
             st.header("Average Rating Per Year ⌚")
-            average_rating_per_year(books_df)
+            average_rating_per_year(cube)
 
         col1, col2 = st.columns(2, gap="large")
         with col1:
@@ -792,7 +581,12 @@ if uploaded_file is not None or just_show_me_the_app:
             distribution_of_book_length(books_df)
 
         with col2:
-            book_title_word_cloud(books_df)
+            book_title_word_cloud(cloud.result())
+            st.checkbox(
+                "Low resolution preview",
+                key="preview_cloud",
+                help="Lays the word cloud out on a smaller canvas, several times faster",
+            )
 
     else:
         st.error("Invalid CSV File. Please upload a valid Goodreads CSV File.")
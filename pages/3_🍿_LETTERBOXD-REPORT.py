@@ -10,9 +10,9 @@ API KEY: OMDB
 
 
 import calendar
+import hashlib
 import os
 import random
-import urllib
 from datetime import datetime
 from functools import wraps
 
@@ -23,147 +23,196 @@ import plotly.express as px
 import requests
 import streamlit as st
 
+from utils.omdb import (
+    DEFAULT_WORKERS,
+    OMDB_FIELDS,
+    OMDBClient,
+    OMDBError,
+    enrich_movies,
+    parse_omdb_columns,
+    resolve_posters,
+    verify_api_key,
+)
+from utils.aggregations import bucket_long_tail
+from utils.cadence import cadence_charts, watch_cadence
+from utils.checkpoints import checkpoint_path, read_checkpoint, write_checkpoint
+from utils.imdb_index import IMDbIndex, enrich_from_index
+from utils.letterboxd import (
+    DIARY_COLUMNS,
+    RATINGS_COLUMNS,
+    build_multi_value_index,
+    cleanup_movies,
+    director_counts,
+    highlight_movies,
+    merge_exports,
+    rank_leaderboards,
+    split_new_movies,
+    value_counts,
+    watch_totals,
+)
+from utils.memo import memoize_section
+from utils.omdb_cache import OMDBCache
+from utils.omdb_quota import KeyScheduler, QuotaExhausted, QuotaLedger, next_reset
+from utils.progress import ThrottledProgress
+
 # #######################
 # # DATA CLEANUP START #
 # #######################
 
 
-def get_omdb_data(title, release_year, user_api_key):
-    API_KEY = user_api_key
-    base_url = "http://www.omdbapi.com/?"
-    parameters = {"apikey": API_KEY, "t": title, "y": release_year}
-    # params_encoded = urllib.parse.urlencode(parameters)
-    # url = base_url + params_encoded
-    response = requests.get(base_url, params=parameters).json()
-
-    # Get the following data from OMDB
-    # Runtime, Genre, Director, Rated, Language, Country, imdbRating, imdbVotes, BoxOffice
-    runtime = response["Runtime"]
-    genre = response["Genre"]
-    director = response["Director"]
-    rated = response["Rated"]
-    language = response["Language"]
-    country = response["Country"]
-    imdb_rating = response["imdbRating"]
-    imdb_votes = response["imdbVotes"]
-    box_office = response["BoxOffice"]
-    return {
-        "Runtime": runtime,
-        "Genre": genre,
-        "Director": director,
-        "Rated": rated,
-        "Language": language,
-        "Country": country,
-        "imdbRating": imdb_rating,
-        "imdbVotes": imdb_votes,
-        "BoxOffice": box_office,
-    }
-
+def get_extend_dataframe_from_api(movie_df: pd.DataFrame, client: OMDBClient, CACHE_ID: int):
+    local_df = None
+    if imdb_index is not None:
+        # movies the offline IMDb index knows never reach OMDB
+        local_df, movie_df = enrich_from_index(movie_df, imdb_index)
+        st.info(
+            f"Found {len(local_df)} movies in the local IMDb index, fetching the other {len(movie_df)} from OMDB."
+        )
 
-def get_extend_dataframe_from_api(movie_df: pd.DataFrame, user_api_key, CACHE_ID: int):
-    skipped_movies = []
+    # one progress bar and a status line redrawn a few times per second, the per movie
+    # log is only offered as a download
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+
+    def update(progress: ThrottledProgress):
+        progress_bar.progress(progress.fraction)
+        status.text(progress.status("films"))
+
+    progress = ThrottledProgress(len(movie_df), update)
+
+    def report(idx, name, year, error):
+        if isinstance(error, QuotaExhausted):
+            # reported once below, these movies are fetched on the next run
+            progress.record(f"⏸️ Waiting for OMDB quota: {name} ({year})")
+        elif error is not None:
+            progress.record(
+                f"❌ Skipping {name} ({year}) due to error: {error.__class__.__name__}: {error}",
+                failed=True,
+            )
+        else:
+            progress.record(f"✅ Added data for {name} ({year})")
 
-    col1, col2 = st.columns(2)
+    # fetch OMDB data for all movies concurrently, spread over every API key with quota left
+    movie_df, skipped_movies, pending_movies = enrich_movies(movie_df, client, on_result=report)
+    if local_df is not None:
+        movie_df = pd.concat([local_df, movie_df]).sort_index()
+    progress_bar.progress(1.0)
 
-    for idx, movie in enumerate(movie_df.iterrows(), start=1):
-        try:
-            # get omdb data for it and add it to the dataframe
-            name = movie[1]["Name"]
-            year = int(movie[1]["Year"])
-
-            omdb_data = get_omdb_data(name, year, user_api_key)
-
-            # add new columns to the dataframe
-            movie_df.loc[movie[0], "Runtime"] = omdb_data["Runtime"]
-            movie_df.loc[movie[0], "Genre"] = omdb_data["Genre"]
-            movie_df.loc[movie[0], "Director"] = omdb_data["Director"]
-            movie_df.loc[movie[0], "Rated"] = omdb_data["Rated"]
-            movie_df.loc[movie[0], "Language"] = omdb_data["Language"]
-            movie_df.loc[movie[0], "Country"] = omdb_data["Country"]
-            movie_df.loc[movie[0], "imdbRating"] = omdb_data["imdbRating"]
-            movie_df.loc[movie[0], "imdbVotes"] = omdb_data["imdbVotes"]
-            movie_df.loc[movie[0], "BoxOffice"] = omdb_data["BoxOffice"]
-
-            if idx % 2 != 0:
-                with col1:
-                    st.write(f"{idx}. ✅ Added data for {name} ({year})")
-            else:
-                with col2:
-                    st.write(f"{idx}. ✅ Added data for {name} ({year})")
-
-        except Exception as e:
-            name = movie[1]["Name"]
-            st.write(f"{idx}. ❌ Skipping {name} due to error: {e.__class__}")
-            skipped_movies.append(name)
-
-    # SAVE CHECKPOINT
     st.info(f"Total movies skipped: {len(skipped_movies)}")
     # st.write(skipped_movies)
-    st.success(
-        f"Processed {len(movie_df)-len(skipped_movies)}. Writing to CSV file. Saving Checkpoint!"
-    )
-    movie_df.to_csv(f"csvs/letterboxd/CHECKPOINT1-{CACHE_ID}.csv", index=False, encoding="utf-8")
-
-
-def cleanup_dataframe(movie_df: pd.DataFrame, CACHE_ID: int):
-    # rename columns
-    movie_df = movie_df.rename(
-        columns={
-            "Name": "Movie",
-            "Rating": "Your Rating",
-            "imdbRating": "IMDB Rating",
-            "imdbVotes": "IMDB Votes",
-            "Runtime": "Runtime (min)",
-        }
-    )
-
-    # replace all "NA" values with NaN
-    movie_df = movie_df.replace("NA", pd.NA)
+    st.success(f"Processed {len(movie_df)-len(skipped_movies)-len(pending_movies)}.")
+    if pending_movies:
+        st.warning(
+            f"⏸️ Paused: every OMDB API key has reached its daily limit, {len(pending_movies)} movies are still waiting for their data. "
+            f"The movies fetched so far are saved. Come back after {next_reset():%Y-%m-%d %H:%M} UTC or add another key, "
+            f"and enter the cache ID {CACHE_ID} to resume where this run stopped."
+        )
+    if progress.log:
+        st.download_button(
+            "Download the OMDB log",
+            progress.log_text(),
+            file_name=f"letterboxd-omdb-log-{CACHE_ID}.txt",
+            mime="text/plain",
+        )
+    # paused when some movies are still waiting for quota
+    return movie_df, bool(pending_movies)
 
-    # keep only the first value of the runtime column (remove the 'min' part)
-    movie_df["Runtime (min)"] = movie_df["Runtime (min)"].str.split(" ").str[0]
 
-    # convert integer columns runtime, imdbRating, imdbVotes to int skip NaN values
-    movie_df["Runtime (min)"] = movie_df["Runtime (min)"].astype(int, errors="ignore")
-    movie_df["IMDB Rating"] = movie_df["IMDB Rating"].astype(int, errors="ignore")
-    movie_df["IMDB Votes"] = movie_df["IMDB Votes"].astype(int, errors="ignore")
+def legacy_checkpoint_path(CACHE_ID: int):
+    return f"csvs/letterboxd/CHECKPOINT1-{CACHE_ID}.csv"
 
-    # remove the '$' and ',' from the BoxOffice column and convert to int
-    movie_df["BoxOffice"] = movie_df["BoxOffice"].str.replace("$", "")
-    movie_df["BoxOffice"] = movie_df["BoxOffice"].str.replace(",", "")
-    movie_df["BoxOffice"] = movie_df["BoxOffice"].astype(int, errors="ignore")
 
-    # mutliply Rating by 2 to get a 10 point scale and convert to int
-    movie_df["Your Rating"] = movie_df["Your Rating"] * 2
-    movie_df["Your Rating"] = movie_df["Your Rating"].astype(int, errors="ignore")
+def has_checkpoint(CACHE_ID: int):
+    return os.path.exists(
+        checkpoint_path("letterboxd", f"CHECKPOINT1-{CACHE_ID}")
+    ) or os.path.exists(legacy_checkpoint_path(CACHE_ID))
 
-    # remove None values from the Language column
-    movie_df["Language"] = movie_df["Language"].str.replace("None", "")
 
-    # remove commas from Year, Runtime, imdbVotes, BoxOffice
-    movie_df["Year"] = movie_df["Year"].astype(str).str.replace(",", "")
-    movie_df["Runtime (min)"] = (
-        movie_df["Runtime (min)"].astype(str).str.replace(",", "")
+def load_checkpoint(CACHE_ID: int):
+    path = checkpoint_path("letterboxd", f"CHECKPOINT1-{CACHE_ID}")
+    if os.path.exists(path):
+        return read_checkpoint(path)
+    # CSV checkpoint written by an older version, OMDB fields are still raw strings
+    return parse_omdb_columns(
+        pd.read_csv(legacy_checkpoint_path(CACHE_ID), encoding="utf-8", header=0)
     )
-    movie_df["IMDB Votes"] = movie_df["IMDB Votes"].astype(str).str.replace(",", "")
-    movie_df["BoxOffice"] = movie_df["BoxOffice"].astype(str).str.replace(",", "")
 
-    # convert Year, Runtime, imdbVotes, BoxOffice to numeric
-    movie_df["Year"] = pd.to_numeric(movie_df["Year"], errors="coerce")
-    movie_df["Runtime (min)"] = pd.to_numeric(
-        movie_df["Runtime (min)"], errors="coerce"
+
+def save_checkpoint(movie_df: pd.DataFrame, CACHE_ID: int):
+    st.success("Saving Checkpoint!")
+    write_checkpoint(movie_df, checkpoint_path("letterboxd", f"CHECKPOINT1-{CACHE_ID}"))
+
+
+def update_enriched_dataframe(movie_df: pd.DataFrame, client: OMDBClient, CACHE_ID: int):
+    # only movies that are not in the stored dataset yet (or were left pending) are sent to OMDB
+    known_df, new_df = split_new_movies(movie_df, load_checkpoint(CACHE_ID), OMDB_FIELDS)
+    if new_df.empty:
+        return known_df, False
+
+    st.info(
+        f"Found {len(new_df)} new movies since this cache was created. Fetching only those."
     )
-    movie_df["IMDB Votes"] = pd.to_numeric(movie_df["IMDB Votes"], errors="coerce")
-    movie_df["BoxOffice"] = pd.to_numeric(movie_df["BoxOffice"], errors="coerce")
+    new_df, paused = get_extend_dataframe_from_api(new_df, client, CACHE_ID)
+    movie_df = pd.concat([known_df, new_df]).sort_index()
+    save_checkpoint(movie_df, CACHE_ID)
+    return movie_df, paused
+
+
+def prepare_dataset(
+    ratings_df: pd.DataFrame,
+    diary_df: pd.DataFrame,
+    client: OMDBClient,
+    CACHE_ID: int,
+):
+    # MERGE DATAFRAMES
+    movie_df = merge_exports(ratings_df, diary_df)
+
+    # enrich everything for a new cache, otherwise only the movies added since the last upload
+    if not has_checkpoint(CACHE_ID):
+        movie_df, paused = get_extend_dataframe_from_api(movie_df, client, CACHE_ID)
+        save_checkpoint(movie_df, CACHE_ID)
+    else:
+        movie_df, paused = update_enriched_dataframe(movie_df, client, CACHE_ID)
+
+    movie_df = cleanup_movies(movie_df)
+    return {
+        # some movies are still waiting for OMDB quota
+        "paused": paused,
+        "movie_df": movie_df,
+        # value -> row positions for Genre, Country and Language, shared by the filters and pies
+        "value_index": build_multi_value_index(movie_df),
+        "leaderboards": rank_leaderboards(movie_df),
+        "highlights": highlight_movies(movie_df),
+        # streaks and weekday/month counts over every diary entry, rewatches included
+        "cadence": watch_cadence(diary_df["Watched Date"]),
+    }
+
+
+def upload_id(*files):
+    # content hash of the uploaded exports
+    digest = hashlib.sha1()
+    for file in files:
+        digest.update(file.getvalue())
+    return digest.hexdigest()[:16]
 
-    # check if csvs folder exists
-    if not os.path.exists("csvs"):
-        os.mkdir("csvs")
-        if not os.path.exists("csvs/letterboxd"):
-            os.mkdir("csvs/letterboxd")
 
-    # SAVE CHECKPOINT
-    movie_df.to_csv(f"csvs/letterboxd/CHECKPOINT2-{CACHE_ID}.csv", index=False, encoding="utf-8")
+def verify_api_key_once(api_key):
+    """
+    True or False once OMDB has accepted or rejected the key, kept for the session so
+    reruns never probe again. None when OMDB could not be asked, the next run retries.
+    """
+    verified = st.session_state.setdefault("letterboxd_verified_keys", {})
+    if api_key not in verified:
+        if len(api_key) != 8:
+            verified[api_key] = False
+        else:
+            try:
+                verified[api_key] = verify_api_key(
+                    api_key, cache=omdb_cache, ledger=quota_ledger
+                )
+            except (requests.RequestException, OMDBError):
+                return None
+    return verified[api_key]
 
 
 # #######################
@@ -171,13 +220,6 @@ def cleanup_dataframe(movie_df: pd.DataFrame, CACHE_ID: int):
 # #######################
 
 
-def get_movie_poster_url(movie, year, api_key):
-    API_KEY = user_api_key
-    base_url = "http://www.omdbapi.com/?"
-    parameters = {"apikey": API_KEY, "t": movie, "y": year}
-    return requests.get(base_url, params=parameters).json()["Poster"]
-
-
 def add_seperator(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -189,126 +231,86 @@ def add_seperator(func):
 
 
 @add_seperator
-#@st.cache
+@memoize_section
 def total_movies_watched(movie_df: pd.DataFrame):
     st.header("Total Movies")
     st.markdown(f"### {len(movie_df)}")
 
 
-#@st.cache
-def best_movies_by_rating(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(
-        by=["Your Rating", "IMDB Rating", "IMDB Votes"], ascending=False
-    )
-    movie_df = movie_df.set_index("Movie")
+@memoize_section
+def best_movies_by_rating(leaderboards: dict):
     st.header("Your Favorite Movies")
-    st.dataframe(
-        movie_df.head(10)[["Your Rating", "IMDB Rating", "IMDB Votes"]],
-        use_container_width=True,
-    )
+    st.dataframe(leaderboards["best_rating"], use_container_width=True)
 
 
-#@st.cache
-def worst_movies_by_rating(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(
-        by=["Your Rating", "IMDB Rating", "IMDB Votes"], ascending=True
-    )
-    movie_df = movie_df.set_index("Movie")
+@memoize_section
+def worst_movies_by_rating(leaderboards: dict):
     st.header("Your Least Favorite Movies")
-    st.dataframe(
-        movie_df.head(10)[["Your Rating", "IMDB Rating", "IMDB Votes"]],
-        use_container_width=True,
-    )
+    st.dataframe(leaderboards["worst_rating"], use_container_width=True)
 
 
-#@st.cache
-def longest_movies_by_runtime(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["Runtime (min)"], ascending=False)
-    movie_df = movie_df.set_index("Movie")
+@memoize_section
+def longest_movies_by_runtime(leaderboards: dict):
     st.header("Longest Runtime Movies")
-    st.dataframe(movie_df.head(10)[["Runtime (min)"]], use_container_width=True)
+    st.dataframe(leaderboards["longest_runtime"], use_container_width=True)
 
 
-#@st.cache
-def shortest_movies_by_runtime(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["Runtime (min)"], ascending=True)
-    movie_df = movie_df.set_index("Movie")
+@memoize_section
+def shortest_movies_by_runtime(leaderboards: dict):
     st.header("Shortest Runtime Movies")
-    st.dataframe(movie_df.head(10)[["Runtime (min)"]], use_container_width=True)
+    st.dataframe(leaderboards["shortest_runtime"], use_container_width=True)
 
 
-#@st.cache
-def best_movies_by_imdb_rating(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["IMDB Rating", "IMDB Votes"], ascending=False)
-    movie_df = movie_df.set_index("Movie")
+@memoize_section
+def best_movies_by_imdb_rating(leaderboards: dict):
     st.header("IMDBs Favorite Movies")
-    st.dataframe(
-        movie_df.head(10)[["IMDB Rating", "IMDB Votes"]], use_container_width=True
-    )
+    st.dataframe(leaderboards["best_imdb_rating"], use_container_width=True)
 
 
-#@st.cache
-def worst_movies_by_imdb_rating(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["IMDB Rating", "IMDB Votes"], ascending=True)
-    movie_df = movie_df.set_index("Movie")
+@memoize_section
+def worst_movies_by_imdb_rating(leaderboards: dict):
     st.header("IMDBs Least Favorite Movies")
-    st.dataframe(
-        movie_df.head(10)[["IMDB Rating", "IMDB Votes"]], use_container_width=True
-    )
+    st.dataframe(leaderboards["worst_imdb_rating"], use_container_width=True)
 
 
-#@st.cache
-def most_popular_movies(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["IMDB Votes"], ascending=False)
+@memoize_section
+def most_popular_movies(leaderboards: dict):
+    # only the 10 ranked rows are formatted
+    movie_df = leaderboards["most_popular"].copy()
     movie_df["IMDB Votes"] = (movie_df["IMDB Votes"] / 1000).round(0)
     movie_df["IMDB Votes"] = movie_df["IMDB Votes"].astype(str) + "K"
     movie_df["IMDB Votes"] = movie_df["IMDB Votes"].str.replace(".0K", " K")
-    movie_df = movie_df.rename(
-        columns={"IMDB Votes": "IMDB Votes"}
-    )  # Renaming the column
-    movie_df = movie_df.set_index("Movie")
     st.header("Most Popular Movies")
-    st.dataframe(movie_df.head(10)[["IMDB Votes"]], use_container_width=True)
+    st.dataframe(movie_df, use_container_width=True)
 
 
-#@st.cache
+@memoize_section
 def most_watched_directors(movie_df: pd.DataFrame):
     # get the count of most watched directors
-    director_df = (
-        movie_df["Director"]
-        .value_counts()
-        .rename_axis("Director")
-        .reset_index(name="Count")
-    )
-    director_df = director_df.sort_values(by=["Count"], ascending=False)
-    director_df = director_df.set_index("Director")
-    director_df = director_df.rename(columns={"Count": "Number of Movies Watched"})
+    director_df = director_counts(movie_df)
     st.header("Most Watched Directors")
     st.dataframe(director_df.head(10), use_container_width=True)
 
 
-#@st.cache
-def highest_grossing_movies(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["BoxOffice"], ascending=False)
+@memoize_section
+def highest_grossing_movies(leaderboards: dict):
+    movie_df = leaderboards["highest_grossing"].copy()
     movie_df["BoxOffice"] = (movie_df["BoxOffice"] / 1000000).round(2)
     movie_df["BoxOffice"] = "$" + movie_df["BoxOffice"].astype(str) + " M"
-    movie_df = movie_df.set_index("Movie")
     st.header("Highest Grossing Movies")
-    st.dataframe(movie_df.head(10)[["BoxOffice"]], use_container_width=True)
+    st.dataframe(movie_df, use_container_width=True)
 
 
-#@st.cache
-def lowest_grossing_movies(movie_df: pd.DataFrame):
-    movie_df = movie_df.sort_values(by=["BoxOffice"], ascending=True)
+@memoize_section
+def lowest_grossing_movies(leaderboards: dict):
+    movie_df = leaderboards["lowest_grossing"].copy()
     movie_df["BoxOffice"] = "$" + movie_df["BoxOffice"].astype(str)
-    # remove last 2 characters
-    movie_df["BoxOffice"] = movie_df["BoxOffice"].str[:-2]
-    movie_df = movie_df.set_index("Movie")
     st.header("Lowest Grossing Movies")
-    st.dataframe(movie_df.head(10)[["BoxOffice"]], use_container_width=True)
+    st.dataframe(movie_df, use_container_width=True)
 
 
 @add_seperator
+@memoize_section
 def director_films_rating_ranked(movie_df: pd.DataFrame, director):
     director_df = movie_df[movie_df["Director"] == director]
     director_df = director_df.sort_values(
@@ -326,22 +328,15 @@ def director_films_rating_ranked(movie_df: pd.DataFrame, director):
     st.plotly_chart(fig, use_container_width=True)
 
 
-#@st.cache
-def pie_chart_genre(movie_df: pd.DataFrame):
-    # seperate genres into a list
-    movie_df["Genre"] = movie_df["Genre"].str.split(", ")
-    movie_df["Genre"] = movie_df["Genre"].str[0]
-    # explode the list into multiple rows
-    movie_df = movie_df.explode("Genre")
-    # group by genre and count the number of movies in each genre
-    genre_df = (
-        movie_df.groupby("Genre").count().sort_values(by=["Movie"], ascending=False)
-    )
+@memoize_section
+def pie_chart_genre(value_index: dict):
+    # every genre a movie lists is counted, not just the first one
+    genre_df = value_counts(value_index["Genre"]).rename_axis("Genre").to_frame("Movie")
     fig = px.pie(genre_df, values="Movie", names=genre_df.index)
     st.plotly_chart(fig, use_container_width=True)
 
 
-#@st.cache
+@memoize_section
 def pie_chart_parental_rating(movie_df: pd.DataFrame):
     parental_rating_df = (
         movie_df["Rated"].value_counts().rename_axis("Rated").reset_index(name="Count")
@@ -351,69 +346,34 @@ def pie_chart_parental_rating(movie_df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=True)
 
 
-#@st.cache
-def pie_chart_country(movie_df: pd.DataFrame):
-    # get a list of all countries
-    country_list = movie_df["Country"]
-    # seperate countries into a list
-    movie_df["Country"] = movie_df["Country"].str.split(", ")
-    movie_df["Country"] = movie_df["Country"].str[0]
-    # explode the list into multiple rows
-    movie_df = movie_df.explode("Country")
-    # group by country and count the number of movies in each country
-    country_df = (
-        movie_df.groupby("Country").count().sort_values(by=["Movie"], ascending=False)
-    )
-
-    # group all countries with less than 5% of the total movies into 'Others'
-    total_movies = country_df["Movie"].sum()
-    other_movies = 0
-    for index, row in country_df.iterrows():
-        if row["Movie"] / total_movies < 0.01:
-            other_movies += row["Movie"]
-            country_df = country_df.drop(index)
-    country_df.loc["Others"] = other_movies
+@memoize_section
+def pie_chart_country(value_index: dict):
+    # count the number of movies for every country they list, countries under 1% go to 'Others'
+    country_df = bucket_long_tail(
+        value_counts(value_index["Country"]).rename_axis("Country"), share=0.01
+    ).to_frame("Movie")
 
     fig = px.pie(country_df, values="Movie", names=country_df.index)
     st.plotly_chart(fig, use_container_width=True)
 
 
-#@st.cache
-def pie_chart_language(movie_df: pd.DataFrame):
-    # get a list of all languages
-    language_list = movie_df["Language"]
-
-    # seperate languages into a list, keep only the first language listed
-    movie_df["Language"] = movie_df["Language"].str.split(", ")
-    movie_df["Language"] = movie_df["Language"].str[0]
-
-    # explode the list into multiple rows
-    movie_df = movie_df.explode("Language")
-    # group by language and count the number of movies in each language
-    language_df = (
-        movie_df.groupby("Language").count().sort_values(by=["Movie"], ascending=False)
-    )
-
-    # group all languages with less than 5% of the total movies into 'Others'
-    total_movies = language_df["Movie"].sum()
-    other_movies = 0
-    for index, row in language_df.iterrows():
-        if row["Movie"] / total_movies < 0.01:
-            other_movies += row["Movie"]
-            language_df = language_df.drop(index)
-    language_df.loc["Others"] = other_movies
+@memoize_section
+def pie_chart_language(value_index: dict):
+    # count the number of movies for every language they list, languages under 1% go to 'Others'
+    language_df = bucket_long_tail(
+        value_counts(value_index["Language"]).rename_axis("Language"), share=0.01
+    ).to_frame("Movie")
 
     fig = px.pie(language_df, values="Movie", names=language_df.index)
     st.plotly_chart(fig, use_container_width=True)
 
 
-#@st.cache
-def top_movies_by_genre(movie_df: pd.DataFrame, genre: str, sort_criteria: str):
-    # drop NA values from Genre
-    movie_df = movie_df.dropna(subset=["Genre"])
-
-    # get movies where genre is in the list of genres
-    genre_df = movie_df[movie_df["Genre"].str.contains(genre)]
+@memoize_section
+def top_movies_by_genre(
+    movie_df: pd.DataFrame, value_index: dict, genre: str, sort_criteria: str
+):
+    # get movies listing the genre straight from the index
+    genre_df = movie_df.iloc[value_index["Genre"].get(genre, [])]
 
     if sort_criteria == "Your Rating":
         # drop NA values
@@ -456,13 +416,10 @@ def top_movies_by_genre(movie_df: pd.DataFrame, genre: str, sort_criteria: str):
     st.plotly_chart(fig, use_container_width=True)
 
 
-#@st.cache
-def top_movies_by_language(movie_df, language):
-    # drop NA values from Language
-    movie_df = movie_df.dropna(subset=["Language"])
-
-    # get movies where language is in the list of languages
-    language_df = movie_df[movie_df["Language"].str.contains(language)]
+@memoize_section
+def top_movies_by_language(movie_df, value_index: dict, language):
+    # get movies listing the language straight from the index
+    language_df = movie_df.iloc[value_index["Language"].get(language, [])]
 
     # drop NA values
     language_df = language_df.dropna(subset=["Your Rating"])
@@ -484,86 +441,84 @@ def top_movies_by_language(movie_df, language):
     st.plotly_chart(fig, use_container_width=True)
 
 
-@add_seperator
-#@st.cache
-def first_and_last_movie_watched(movie_df, api_key):
-    first_movie_watched = movie_df.sort_values(by=["Watched Date"], ascending=True)
-    first = first_movie_watched["Movie"].head(1).to_string(index=False)
-    first_date = first_movie_watched["Watched Date"].head(1).to_string(index=False)
+def highlight_posters(highlights: dict, client: OMDBClient, dataset_key: str):
+    # posters are resolved once per dataset (upload and cache ID) and kept for the session
+    session_key = f"letterboxd_posters_{dataset_key}"
+    if session_key not in st.session_state:
+        for key in [key for key in st.session_state if str(key).startswith("letterboxd_posters_")]:
+            del st.session_state[key]
+        posters = {}
+        for movie in highlights.values():
+            poster = movie.get("Poster")
+            # reuse the poster URL returned during enrichment when the checkpoint has it
+            posters[(movie["Movie"], int(movie["Year"]))] = (
+                poster if isinstance(poster, str) else None
+            )
+        missing = [key for key, poster in posters.items() if poster is None]
+        posters.update(resolve_posters(missing, client))
+        st.session_state[session_key] = posters
+    return st.session_state[session_key]
 
-    last_movie_watched = movie_df.sort_values(by=["Watched Date"], ascending=False)
-    last = last_movie_watched["Movie"].head(1).to_string(index=False)
-    last_date = last_movie_watched["Watched Date"].head(1).to_string(index=False)
 
-    # format the dates to human readable format
-    first_date = datetime.strptime(first_date, "%Y-%m-%d").strftime("%d %B %Y")
-    last_date = datetime.strptime(last_date, "%Y-%m-%d").strftime("%d %B %Y")
+def show_poster(posters: dict, movie: pd.Series):
+    poster = posters.get((movie["Movie"], int(movie["Year"])))
+    # OMDB uses "N/A" for movies without a poster
+    if poster and poster != "N/A":
+        st.image(poster, width=200)
 
-    # get the year of the first and last movie watched
-    first_year = first_movie_watched["Year"].head(1).to_string(index=False)
-    last_year = last_movie_watched["Year"].head(1).to_string(index=False)
 
-    # conver the year to int with no decimal
-    first_year = int(float(first_year))
-    last_year = int(float(last_year))
+@add_seperator
+@memoize_section
+def first_and_last_movie_watched(highlights: dict, posters: dict):
+    if "first" not in highlights:
+        st.warning("None of your rated movies have a watched date in your diary.")
+        return
+    first, last = highlights["first"], highlights["last"]
 
-    # get the poster of the first and last movie watched
-    first_poster = get_movie_poster_url(first, first_year, api_key)
-    last_poster = get_movie_poster_url(last, last_year, api_key)
+    # format the dates to human readable format
+    first_date = datetime.strptime(first["Watched Date"], "%Y-%m-%d").strftime("%d %B %Y")
+    last_date = datetime.strptime(last["Watched Date"], "%Y-%m-%d").strftime("%d %B %Y")
 
     col1, col2 = st.columns(2)
     with col1:
         st.header("First movie in your Diary")
-        st.markdown(f"**{first}** on **{first_date}**")
-        st.image(first_poster, width=200)
+        st.markdown(f"**{first['Movie']}** on **{first_date}**")
+        show_poster(posters, first)
 
     with col2:
         st.header("Latest movie Diary")
-        st.markdown(f"**{last}** on **{last_date}**")
-        st.image(last_poster, width=200)
+        st.markdown(f"**{last['Movie']}** on **{last_date}**")
+        show_poster(posters, last)
 
 
-#@st.cache
 @add_seperator
-def shortest_and_longest_movie_watched(movie_df, api_key):
-    shortest_movie_watched = movie_df.sort_values(by=["Runtime (min)"], ascending=True)
-    shortest = shortest_movie_watched["Movie"].head(1).to_string(index=False)
-    shortest_runtime = str(
-        shortest_movie_watched["Runtime (min)"].head(1).to_string(index=False)
-    )[:-2]
-
-    longest_movie_watched = movie_df.sort_values(by=["Runtime (min)"], ascending=False)
-    longest = longest_movie_watched["Movie"].head(1).to_string(index=False)
-    longest_runtime = str(
-        longest_movie_watched["Runtime (min)"].head(1).to_string(index=False)
-    )[:-2]
-
-    # get the year of the shortest and longest movie watched
-    shortest_year = shortest_movie_watched["Year"].head(1).to_string(index=False)
-    longest_year = longest_movie_watched["Year"].head(1).to_string(index=False)
-
-    # conver the year to int with no decimal
-    shortest_year = int(float(shortest_year))
-    longest_year = int(float(longest_year))
-
-    shortest_poster = get_movie_poster_url(shortest, shortest_year, api_key)
-    longest_poster = get_movie_poster_url(longest, longest_year, api_key)
+@memoize_section
+def shortest_and_longest_movie_watched(highlights: dict, posters: dict):
+    if "shortest" not in highlights:
+        return
+    shortest, longest = highlights["shortest"], highlights["longest"]
+    shortest_runtime = int(shortest["Runtime (min)"])
+    longest_runtime = int(longest["Runtime (min)"])
 
     col1, col2 = st.columns(2)
     with col1:
         st.header("Shortest Movie")
-        st.markdown(f"**{shortest}** with a runtime of **{shortest_runtime} minutes**")
-        st.image(shortest_poster, width=200)
+        st.markdown(
+            f"**{shortest['Movie']}** with a runtime of **{shortest_runtime} minutes**"
+        )
+        show_poster(posters, shortest)
 
     with col2:
         st.header("Longest Movie")
-        st.markdown(f"**{longest}** with a runtime of **{longest_runtime} minutes**")
-        st.image(longest_poster, width=200)
+        st.markdown(
+            f"**{longest['Movie']}** with a runtime of **{longest_runtime} minutes**"
+        )
+        show_poster(posters, longest)
 
 
-#@st.cache
+@memoize_section
 def total_time_watched(movie_df):
-    total_minutes_watched = movie_df["Runtime (min)"].sum()
+    total_minutes_watched = watch_totals(movie_df)["minutes"]
     # convert minutes to hours and minutes
     hours, minutes = divmod(total_minutes_watched, 60)
     hours, minutes = int(hours), int(minutes)
@@ -571,16 +526,16 @@ def total_time_watched(movie_df):
     st.markdown(f"**{hours} hours and {minutes} minutes**")
 
 
-#@st.cache
+@memoize_section
 def average_movie_rating(movie_df):
-    average_movie_rating = movie_df["Your Rating"].mean().round(2)
+    average_movie_rating = watch_totals(movie_df)["average_rating"]
     st.header("Average Movie Rating")
     st.markdown(f"**{average_movie_rating}**")
 
 
-#@st.cache
+@memoize_section
 def average_movie_runtime(movie_df):
-    average_movie_runtime = movie_df["Runtime (min)"].mean()
+    average_movie_runtime = watch_totals(movie_df)["average_runtime"]
     # convert minutes to hours and minutes
     hours, minutes = divmod(average_movie_runtime, 60)
     hours, minutes = int(hours), int(minutes)
@@ -588,18 +543,71 @@ def average_movie_runtime(movie_df):
     st.markdown(f"**{hours} hours and {minutes} minutes**")
 
 
-#@st.cache
-def oldest_release_date(movie_df, api_key):
-    oldest_release_date = movie_df.sort_values(by=["Year"], ascending=True)
-    oldest = oldest_release_date["Movie"].head(1).to_string(index=False)
-    oldest_release = oldest_release_date["Year"].head(1).to_string(index=False)
-
-    oldest_release = int(float(oldest_release))
-    oldest_poster = get_movie_poster_url(oldest, oldest_release, api_key)
+@memoize_section
+def oldest_release_date(highlights: dict, posters: dict):
+    if "oldest" not in highlights:
+        return
+    oldest = highlights["oldest"]
 
     st.header("Oldest Release Date")
-    st.markdown(f"**{oldest}** released in **{oldest_release}**")
-    st.image(oldest_poster, width=200)
+    st.markdown(f"**{oldest['Movie']}** released in **{int(oldest['Year'])}**")
+    show_poster(posters, oldest)
+
+
+def format_runs(runs: pd.DataFrame):
+    return runs.assign(
+        Start=runs["Start"].dt.strftime("%d %B %Y"), End=runs["End"].dt.strftime("%d %B %Y")
+    ).set_index("Days")
+
+
+@add_seperator
+@memoize_section
+def watch_streaks(cadence: dict):
+    if not cadence["watches"]:
+        st.warning("None of your diary entries have a watched date.")
+        return
+    streak, gap = cadence["streaks"].iloc[0], cadence["gaps"]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.header("Longest Watch Streak")
+        st.markdown(
+            f"**{streak['Days']} days** in a row, from **{streak['Start']:%d %B %Y}** to **{streak['End']:%d %B %Y}**"
+        )
+    with col2:
+        st.header("Longest Break")
+        if gap.empty:
+            st.markdown("You never skipped a day!")
+        else:
+            gap = gap.iloc[0]
+            st.markdown(
+                f"**{gap['Days']} days** without a movie, from **{gap['Start']:%d %B %Y}** to **{gap['End']:%d %B %Y}**"
+            )
+    with col3:
+        st.header("Movie Days")
+        st.markdown(
+            f"**{cadence['watches']}** diary entries on **{cadence['active_days']}** different days"
+        )
+
+    col1, col2 = st.columns(2, gap="large")
+    with col1:
+        st.subheader("Your Longest Streaks")
+        st.dataframe(format_runs(cadence["streaks"]), use_container_width=True)
+    with col2:
+        st.subheader("Your Longest Breaks")
+        st.dataframe(format_runs(cadence["gaps"]), use_container_width=True)
+
+
+@memoize_section
+def viewing_cadence(cadence: dict):
+    charts = cadence_charts(cadence)
+    col1, col2 = st.columns(2, gap="large")
+    with col1:
+        st.header("Movies by Weekday")
+        st.plotly_chart(charts["weekdays"], use_container_width=True)
+    with col2:
+        st.header("Movies by Month")
+        st.plotly_chart(charts["months"], use_container_width=True)
 
 
 # def adult_movies_watched(movie_df):
@@ -622,31 +630,6 @@ def oldest_release_date(movie_df, api_key):
 #     print(tabulate(tabular_data=lowly_rated_but_imdb_high[['Movie', 'IMDB Rating', 'Rating']], headers = 'keys', tablefmt = 'fancy_grid', showindex=False))
 
 
-# # TODO: Function needs to be tested
-# def longest_watch_streak(movie_df):
-#     from datetime import timedelta
-#     # sort by date
-#     movie_df = movie_df.sort_values(by=['Watched Date'], ascending=True)
-#     # create a new column with the difference between the current date and the previous date
-#     movie_df['Watched Date'] = pd.to_datetime(movie_df['Watched Date'])
-#     movie_df['streak'] = movie_df['Watched Date'].diff()
-
-#     # select date column where streak is max
-#     longest_streak = movie_df.loc[movie_df['streak'].idxmax()]
-#     jump_days = longest_streak['streak'].days+1
-
-#     # go back jump_day rows to get the movie before the longest streak
-#     movie_before_streak = movie_df.iloc[movie_df.index.get_loc(longest_streak.name) - jump_days]
-
-#     # get the date of the movie before the longest streak
-#     start = movie_before_streak['Watched Date'].date()
-
-#     # add the jump_days to the start date to get the end date
-#     end = start + timedelta(days=jump_days)
-#     end = end.strftime('%Y-%m-%d')
-#     print(tabulate(tabular_data=[['Longest Watch Streak', f'{jump_days} days', start, end]], headers = ['#', 'Days', 'Start', 'End'], tablefmt = 'fancy_grid', showindex=False))
-
-
 # #########################
 # FRONT-END SECTION START #
 # #########################
@@ -699,7 +682,7 @@ So why wait? Try out the Letterboxd Movie Analysis Report tool today and unlock
 
 st.write("---")
 st.warning(
-    "Please Note: CSV should not contain more than 1000 movies. OMDB API has a limit of 1000 requests per day. If you have more than 1000 movies, please split your CSV into multiple CSVs and upload them separately using different OMDB API Keys. 🛑"
+    "Please Note: OMDB API has a limit of 1000 requests per day per key. If you have more than 1000 movies, enter several OMDB API Keys separated by commas and the requests are spread over them. If every key runs out, the report pauses and resumes with your cache ID once the limits reset. 🛑"
 )
 
 col1, col2 = st.columns(2, gap="large")
@@ -755,24 +738,47 @@ ratings_file = st.file_uploader(
 )
 
 user_api_key = st.text_input(
-    "Enter your OMBD API key here",
-    placeholder="Eight lettered OMDB API key",
-    help="You can get your OMDB API key from here: http://www.omdbapi.com/apikey.aspx",
+    "Enter your OMBD API key(s) here",
+    placeholder="Eight lettered OMDB API key, separate several keys with commas",
+    help="You can get your OMDB API key from here: http://www.omdbapi.com/apikey.aspx. Every key allows 1000 requests per day.",
 )
 
 
 CACHE_ID = st.text_input(
     "Enter your cache ID here",
     placeholder="Cache ID",
-    help="This is the ID you used to cache your data. If you don't have one, leave this blank.",
+    help="This is the ID you used to cache your data. If you don't have one, leave this blank. Uploading a newer export with the same ID only fetches the movies added since.",
 )
 
+# OMDB responses are cached on disk and shared by every session and CACHE_ID
+omdb_cache = OMDBCache()
+# requests sent today by every API key, kept next to the cache
+quota_ledger = QuotaLedger()
+
+omdb_workers = st.slider(
+    "Parallel OMDB requests",
+    min_value=1,
+    max_value=16,
+    value=DEFAULT_WORKERS,
+    help="Number of movies looked up at the same time. Requests are still rate limited, lower this if OMDB starts refusing them.",
+)
+
+# movies found in the offline IMDb index (python -m utils.imdb_index) cost no OMDB request
+imdb_index = None
+if IMDbIndex.exists():
+    if st.checkbox(
+        "Look movies up in the local IMDb index first",
+        value=True,
+        help="Runtime, genre, director, rating and votes come from the IMDb datasets, only the remaining movies are sent to OMDB. Country, language, parental rating and box office are not part of the IMDb datasets.",
+    ):
+        imdb_index = IMDbIndex()
+
 # TODO: ADD A INPUT BOX FOR USERS TO ENTER THEIR OMBD KEY HERE AND MAKE ONE REQUEST TO CHECK ITS AUTHENTICITY. PROGRESS ONLY IF KEY IS VALID. MENTION THAT WE DO NOT STORE THE KEY IN ANY WAY. REQUEST LIMIT PER DAY IS 1000. PASS THAT KEY TI get_extend_dataframe_from_api function instead of using your own key.
 
 if diary_file is not None:
     # VERIFY FILE -> DIARY
     diary_df = pd.read_csv(diary_file, encoding="utf-8", header=0)
-    cols_to_check = ["Date", "Name", "Year", "Letterboxd URI", "Rating", "Watched Date"]
+    cols_to_check = DIARY_COLUMNS
     if set(cols_to_check).issubset(set(diary_df.columns)):
         st.success("Diary file uploaded successfully!")
         diary_df = diary_df[cols_to_check]
@@ -786,9 +792,12 @@ if diary_file is not None:
 if ratings_file is not None:
     # VERIFY FILE -> RATINGS
     ratings_df = pd.read_csv(ratings_file, encoding="utf-8", header=0)
-    cols_to_check = ["Date", "Name", "Year", "Rating"]
+    cols_to_check = list(RATINGS_COLUMNS)
     if set(cols_to_check).issubset(set(ratings_df.columns)):
         st.success("Ratings file uploaded successfully!")
+        # keep the URI when present, it identifies a film across exports
+        if "Letterboxd URI" in ratings_df.columns:
+            cols_to_check.append("Letterboxd URI")
         ratings_df = ratings_df[cols_to_check]
 
     else:
@@ -798,26 +807,27 @@ if ratings_file is not None:
         st.stop()
 
 
-if len(user_api_key) == 8:
-    KEY_VERIFICATION_PASSED = False
-    # get the movie name and year from the first row of the dataframe
-    name = "Reservoir Dogs"
-    year = 1992
-    base_url = "http://www.omdbapi.com/?"
-    parameters = {"apikey": user_api_key, "t": name, "y": year}
-    params_encoded = urllib.parse.urlencode(
-        parameters, quote_via=urllib.parse.quote, safe=""
-    )
-    url = base_url + params_encoded
-
-    response = requests.get(url).json()
-
-    # check status code of the response
-    if response["Response"] == "True":
-        st.success("This is a valid OMDB API Key.")
-        KEY_VERIFICATION_PASSED = True
-    else:
-        st.error("This is not a valid OMDB API Key.")
+api_keys = list(dict.fromkeys(user_api_key.replace(",", " ").split()))
+if api_keys:
+    # the probe reads through the shared OMDB cache, keys verified recently cost no request
+    valid_keys = []
+    for key in api_keys:
+        verified = verify_api_key_once(key)
+        if verified:
+            valid_keys.append(key)
+        elif verified is None:
+            st.warning(f"Could not reach OMDB to verify {key[:2]}******, rerun to try again.")
+        else:
+            st.error(f"{key[:2]}****** is not a valid OMDB API Key.")
+    KEY_VERIFICATION_PASSED = bool(valid_keys)
+    if KEY_VERIFICATION_PASSED:
+        scheduler = KeyScheduler(valid_keys, quota_ledger)
+        st.success(
+            f"{len(valid_keys)} valid OMDB API Key(s) with {scheduler.total_remaining()} requests left today."
+        )
+        # enrichment and poster lookups of this run share one request rate, and repeated
+        # (title, year) lookups share one request
+        omdb_client = OMDBClient(cache=omdb_cache, scheduler=scheduler, workers=omdb_workers)
 
 else:
     st.error("Please enter a valid OMBD API key to continue.")
@@ -833,42 +843,32 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
         elif len(CACHE_ID) != 10 or not CACHE_ID.isnumeric():
             st.error("Please enter a valid cache ID to continue.")
 
-    else:
-        # generate a 10 digit random number
-        CACHE_ID = random.randint(1000000000, 9999999999)
+    UPLOAD_ID = upload_id(diary_file, ratings_file)
+    if not CACHE_ID:
+        # generate a 10 digit random number, once per upload so widget reruns keep it
+        CACHE_ID = st.session_state.setdefault(
+            f"letterboxd_cache_id_{UPLOAD_ID}", random.randint(1000000000, 9999999999)
+        )
 
     #TODO: UNCOMMENT THIS TO DEBUG CACHE_ID
     # st.write(CACHE_ID)
     # st.stop()
-    
-    
-    # MERGE DATAFRAMES
-    movie_df = ratings_df
-    # add column to movie_df for Watched Date
-    movie_df["Watched Date"] = ""
-
-    # check if ratings_df['Movie'] is in diary_df['Movie'] and value matches and if so then add diary_df['Watched Date'] to movie_df['Watched Date']
-    for index, row in movie_df.iterrows():
-        if row["Name"] in diary_df["Name"].values:
-            movie_df.loc[index, "Watched Date"] = diary_df.loc[
-                diary_df["Name"] == row["Name"], "Watched Date"
-            ].values[0]
-
-    # drop the Date column from movie_df
-    movie_df = movie_df.drop(columns=["Date"])
-
 
-
-    # # check if csvs/Letterboxd folder exists and file CHECKPOINT1.csv exists, if not then run cleanup_dataframe
-    if not os.path.exists(f"csvs/letterboxd/CHECKPOINT1-{CACHE_ID}.csv"):
-        get_extend_dataframe_from_api(movie_df, user_api_key, CACHE_ID)
-
-    if not os.path.exists(f"csvs/letterboxd/CHECKPOINT2-{CACHE_ID}.csv"):
-        cleanup_dataframe(movie_df, CACHE_ID)
-
-
-
-    movie_df = pd.read_csv(f"csvs/letterboxd/CHECKPOINT2-{CACHE_ID}.csv", encoding="utf-8", header=0)
+    # everything derived from the upload is kept for the session, a widget change only
+    # reruns the (memoized) sections instead of merging and enriching again
+    dataset_key = f"letterboxd_dataset_{UPLOAD_ID}_{CACHE_ID}"
+    dataset = st.session_state.get(dataset_key)
+    if dataset is None:
+        for key in [key for key in st.session_state if str(key).startswith("letterboxd_dataset_")]:
+            del st.session_state[key]
+        dataset = prepare_dataset(ratings_df, diary_df, omdb_client, CACHE_ID)
+        # a paused dataset is not kept, the next run resumes the enrichment from the checkpoint
+        if not dataset["paused"]:
+            st.session_state[dataset_key] = dataset
+    movie_df = dataset["movie_df"]
+    value_index = dataset["value_index"]
+    leaderboards = dataset["leaderboards"]
+    highlights = dataset["highlights"]
 
     st.info(f"Your CACHE ID is {CACHE_ID}. Please save this ID for future use to avoid re-running the API calls.")
 
@@ -881,32 +881,32 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     col1, col2 = st.columns(2, gap="large")
 
     with col1:
-        best_movies_by_rating(movie_df)
+        best_movies_by_rating(leaderboards)
 
     with col2:
-        worst_movies_by_rating(movie_df)
+        worst_movies_by_rating(leaderboards)
 
     st.markdown("---")
     col1, col2 = st.columns(2, gap="large")
 
     with col1:
-        longest_movies_by_runtime(movie_df)
+        longest_movies_by_runtime(leaderboards)
 
     with col2:
-        shortest_movies_by_runtime(movie_df)
+        shortest_movies_by_runtime(leaderboards)
 
     st.markdown("---")
     col1, col2 = st.columns(2, gap="large")
     with col1:
-        best_movies_by_imdb_rating(movie_df)
+        best_movies_by_imdb_rating(leaderboards)
 
     with col2:
-        worst_movies_by_imdb_rating(movie_df)
+        worst_movies_by_imdb_rating(leaderboards)
 
     st.markdown("---")
     col1, col2 = st.columns(2, gap="large")
     with col1:
-        most_popular_movies(movie_df)
+        most_popular_movies(leaderboards)
 
     with col2:
         most_watched_directors(movie_df)
@@ -914,10 +914,10 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     st.markdown("---")
     col1, col2 = st.columns(2, gap="large")
     with col1:
-        highest_grossing_movies(movie_df)
+        highest_grossing_movies(leaderboards)
 
     with col2:
-        lowest_grossing_movies(movie_df)
+        lowest_grossing_movies(leaderboards)
 
     st.info("🔖 Note: The Box Office figures are for US and Canada only, not worldwide.")
 
@@ -944,7 +944,7 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     col1, col2 = st.columns(2, gap="large")
     with col1:
         st.header("Genre Distribution")
-        pie_chart_genre(movie_df)
+        pie_chart_genre(value_index)
     with col2:
         st.header("Parental Rating Distribution")
         pie_chart_parental_rating(movie_df)
@@ -957,10 +957,10 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     col1, col2 = st.columns(2, gap="large")
     with col1:
         st.header("Country Distribution")
-        pie_chart_country(movie_df)
+        pie_chart_country(value_index)
     with col2:
         st.header("Language Distribution")
-        pie_chart_language(movie_df)
+        pie_chart_language(value_index)
 
     st.info(
         "🔖 Note: These pie charts are interactive. Hover over the slices to see the exact values. Click on the legend to hide/show the slices."
@@ -968,13 +968,11 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     st.markdown("---")
 
     st.header("Movie Rankings by Genre")
-    genre_list = movie_df["Genre"].unique().tolist()
+    genre_list = sorted(value_index["Genre"])
 
     col1, col2 = st.columns(2, gap="large")
 
     with col1:
-        # remove nan values from the list
-        genre_list = [x for x in genre_list if str(x) != "nan"]
         # add None to the list on top
         genre_list.insert(0, None)
 
@@ -995,22 +993,15 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     )
 
     if selected_genre:
-        top_movies_by_genre(movie_df, selected_genre, sorted_by)
+        top_movies_by_genre(movie_df, value_index, selected_genre, sorted_by)
 
     st.markdown("---")
 
     st.header("Movie Rankings by Language")
 
-    lang_list = movie_df["Language"].unique().tolist()
-
-    # remove nan values from the list
-    lang_list = [x for x in lang_list if str(x) != "nan"]
-
-    # remove '' values from the list
-    lang_list = [x for x in lang_list if str(x) != ""]
-
-    # remove languages for which there are less than 5 movies
-    lang_list = [x for x in lang_list if len(movie_df[movie_df["Language"] == x]) > 5]
+    # only languages with more than 5 movies, most common first
+    language_counts = value_counts(value_index["Language"])
+    lang_list = language_counts[language_counts > 5].index.tolist()
 
     # add None to the list on top
     lang_list.insert(0, None)
@@ -1023,13 +1014,19 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     )
 
     if selected_language:
-        top_movies_by_language(movie_df, selected_language)
+        top_movies_by_language(movie_df, value_index, selected_language)
 
     st.markdown("---")
 
-    first_and_last_movie_watched(movie_df, user_api_key)
+    posters = highlight_posters(highlights, omdb_client, dataset_key)
+
+    first_and_last_movie_watched(highlights, posters)
+
+    shortest_and_longest_movie_watched(highlights, posters)
 
-    shortest_and_longest_movie_watched(movie_df, user_api_key)
+    watch_streaks(dataset["cadence"])
+    viewing_cadence(dataset["cadence"])
+    st.markdown("---")
 
     col1, col2 = st.columns(2, gap="large")
     with col1:
@@ -1043,6 +1040,11 @@ if KEY_VERIFICATION_PASSED and diary_file is not None and ratings_file is not No
     with col1:
         average_movie_runtime(movie_df)
     with col2:
-        oldest_release_date(movie_df, user_api_key)
+        oldest_release_date(highlights, posters)
 
     st.markdown("---")
+
+    if omdb_client.coalescer.saved:
+        st.caption(
+            f"{omdb_client.coalescer.saved} repeated OMDB lookups shared a request with an identical one, {omdb_client.coalescer.calls} lookups were made."
+        )
@@ -10,86 +10,20 @@ API KEY: None
 
 
 import json
-import os
 from functools import wraps
 
 import pandas as pd
 import streamlit as st
 
+from utils.checkpoints import upload_checkpoint, upload_digest
+from utils.memo import memoize_section
+from utils.steam import COLUMNS, clean_games, genre_list
 
 # #######################
 # # DATA CLEANUP START #
 # #######################
 def cleanup_dataframe(games_df: pd.DataFrame):
-
-    # drop id column
-    games_df = games_df.drop("id", axis=1)
-
-    # keep only year part of release_date
-    games_df["release_date"] = pd.to_datetime(games_df["release_date"])
-    games_df["release_date"] = games_df["release_date"].dt.year
-
-    # rename release_dated to released
-    games_df = games_df.rename(columns={"release_date": "released"})
-
-    # create empty column genres
-    games_df["genres"] = pd.Series(dtype=object)
-
-    # create empty platform columns
-    games_df["platforms"] = pd.Series(dtype=object)
-
-    # shift the second last column to first position
-    games_df.insert(0, "genres", games_df.pop("genres"))
-
-    #############
-    # GENRES
-    #############
-
-    # genre columns are columns 15-end
-    genre_columns = games_df.columns[14:]
-
-    # iterrate over each row
-    for index, row in games_df.iterrows():
-        to_add = [column for column in genre_columns if row[column] == "x"]
-        games_df.at[index, "genres"] = ", ".join(to_add)
-
-    # drop the genre_columns
-    games_df = games_df.drop(genre_columns, axis=1)
-
-    #############
-    # PLATFORMS
-    #############
-
-    # platforms columns are mac, linux, windows, steamdeck
-    my_platforms = ["mac", "linux", "win", "steam deck"]
-
-    for index, row in games_df.iterrows():
-        to_add = [column for column in my_platforms if row[column] == "x"]
-        # fill - where platforms is NA
-        if not to_add:
-            to_add.append("-")
-        games_df.at[index, "platforms"] = ", ".join(to_add)
-
-    # drop the platform columns
-    games_df = games_df.drop(my_platforms, axis=1)
-
-    # move game column to first place
-    games_df.insert(0, "game", games_df.pop("game"))
-
-    # drop other unnecessary columns
-    games_df = games_df.drop("wilsonscore", axis=1)
-    games_df = games_df.drop("sdbrating", axis=1)
-
-    # fill 0 where hours is NA
-    games_df["hours"] = games_df["hours"].fillna(0)
-
-    # fill "-" where metascore is NA
-    games_df["metascore"] = games_df["metascore"].fillna(pd.NA)
-
-    # # fill "-" where Userscore is NA
-    games_df["userscore"] = games_df["userscore"].fillna(pd.NA)
-
-    games_df.to_csv("csvs/steam/CHECKPOINT1.csv", index=False, encoding="utf-8")
+    return clean_games(games_df)
 
 
 # #######################
@@ -105,18 +39,20 @@ def add_seperator(func):
     return wrapper
 
 
+@memoize_section
 def total_games_count(games_df: pd.DataFrame):
     st.header("Total :green[Games] Played")
     st.markdown(f"## {len(games_df.index)}")
 
 
+@memoize_section
 def genre_count(games_df: pd.DataFrame):
-    genres = games_df["genres"].str.split(", ", expand=True).stack().unique()
-    genres = [genre for genre in genres if genre != ""]
+    genres = genre_list(games_df)
     st.header("Total :red[Genres]")
     st.markdown(f"## {len(genres)}")
 
 
+@memoize_section
 def total_hours_played(games_df: pd.DataFrame):
     st.header("Total :blue[Hours] Played")
     st.markdown(f"## {games_df['hours'].sum()}")
@@ -198,29 +134,18 @@ upload_file = st.file_uploader(
 # VERIFY FILE -> GAMES
 if upload_file is not None:
     games_df = pd.read_csv(upload_file, encoding="utf-8", header=0)
-    cols_to_check = [
-        "game",
-        "id",
-        "hours",
-        "last_played",
-        "metascore",
-        "userscore",
-        "userscore_count",
-        "release_date",
-        "win",
-        "mac",
-        "linux",
-        "steam deck",
-    ]
-    if set(cols_to_check).issubset(set(games_df.columns)):
+    if set(COLUMNS).issubset(set(games_df.columns)):
 
         st.success("Steam Library file uploaded successfully!")
 
-        # check if file exists, if not, run cleanup function to create it
-        if not os.path.isfile("csvs/steam/CHECKPOINT1.csv"):
-            cleanup_dataframe(games_df)
-
-        games_df = pd.read_csv("csvs/steam/CHECKPOINT1.csv", encoding="utf-8", header=0)
+        # the checkpoint of this exact upload, cleaned and written the first time it is seen,
+        # the overview only needs these columns, the rest stay on disk
+        games_df = upload_checkpoint(
+            "steam",
+            upload_digest(upload_file),
+            lambda: cleanup_dataframe(games_df),
+            columns=["game", "genres", "hours"],
+        )
 
         st.write("---")
 
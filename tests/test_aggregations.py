@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregations import bucket_long_tail, rank_top_k
+
+
+def test_rank_top_k_nan_tie_breakers_keep_k_rows():
+    # every row tied on the first key, the tie breakers not fetched yet
+    df = pd.DataFrame(
+        {"Your Rating": [4.0] * 20, "IMDB Rating": np.nan, "IMDB Votes": np.nan}
+    )
+    boards = {
+        "best": (["Your Rating", "IMDB Rating", "IMDB Votes"], True, ["Your Rating"]),
+        "worst": (["Your Rating", "IMDB Rating", "IMDB Votes"], False, ["Your Rating"]),
+    }
+    ranked = rank_top_k(df, boards, k=10)
+    assert len(ranked["best"]) == 10
+    assert len(ranked["worst"]) == 10
+    # ties keep their original order
+    assert list(ranked["best"].index) == list(range(10))
+
+
+def test_rank_top_k_ties_at_the_boundary():
+    df = pd.DataFrame(
+        {
+            "score": [5, 3, 3, 3, 1, np.nan],
+            "votes": [1, np.nan, 20, 10, 5, 7],
+        },
+        index=["a", "b", "c", "d", "e", "f"],
+    )
+    boards = {
+        "top": (["score", "votes"], True, ["score", "votes"]),
+        "bottom": (["score", "votes"], False, ["score", "votes"]),
+    }
+    ranked = rank_top_k(df, boards, k=3)
+    # tie on score at the 3rd place is broken by votes, the missing vote ranks last
+    assert list(ranked["top"].index) == ["a", "c", "d"]
+    assert list(ranked["bottom"].index) == ["e", "d", "c"]
+
+
+def test_rank_top_k_missing_first_key_ranks_last():
+    df = pd.DataFrame({"runtime": [np.nan, 90.0, np.nan, 120.0]})
+    boards = {"longest": (["runtime"], True, ["runtime"])}
+    top = rank_top_k(df, boards, k=3)["longest"]
+    assert top["runtime"].tolist()[:2] == [120.0, 90.0]
+    assert len(top) == 3 and top["runtime"].isna().iloc[2]
+
+
+def test_rank_top_k_non_unique_index():
+    df = pd.DataFrame({"rating": [1, 2, 3, 4]}, index=[0, 0, 1, 1])
+    top = rank_top_k(df, {"best": (["rating"], True, ["rating"])}, k=2)["best"]
+    assert top["rating"].tolist() == [4, 3]
+
+
+def test_bucket_long_tail_top_k():
+    counts = pd.Series({"a": 1, "b": 5, "c": 3, "d": 2}, name="Count")
+    counts.index.name = "Publisher"
+    bucketed = bucket_long_tail(counts, top_k=2)
+    assert bucketed.to_dict() == {"b": 5, "c": 3, "Others": 3}
+    assert list(bucketed.index) == ["b", "c", "Others"]
+    assert bucketed.name == "Count"
+    assert bucketed.index.name == "Publisher"
+
+
+def test_bucket_long_tail_share_and_top_k():
+    counts = pd.Series({"a": 50, "b": 30, "c": 15, "d": 5})
+    # c passes the share but not top_k, d neither
+    assert bucket_long_tail(counts, share=0.1, top_k=2).to_dict() == {
+        "a": 50,
+        "b": 30,
+        "Others": 20,
+    }
+    assert bucket_long_tail(counts, share=0.1).to_dict() == {
+        "a": 50,
+        "b": 30,
+        "c": 15,
+        "Others": 5,
+    }
+
+
+def test_bucket_long_tail_nothing_to_bucket():
+    counts = pd.Series({"a": 2, "b": 1})
+    bucketed = bucket_long_tail(counts, top_k=5, other_label="Rest")
+    assert bucketed.to_dict() == {"a": 2, "b": 1}
+    assert "Rest" not in bucketed.index
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from utils.cadence import run_lengths, watch_cadence
+
+
+def test_run_lengths():
+    starts, lengths = run_lengths(np.array([1, 1, 0, 1, 0, 0, 1, 1, 1], dtype=bool))
+    assert starts.tolist() == [0, 3, 6]
+    assert lengths.tolist() == [2, 1, 3]
+
+
+def test_streaks_gaps_and_counts():
+    dates = [
+        "2023-01-02",  # Monday
+        "2023-01-03",
+        "2023-01-03",  # a rewatch the same day
+        "2023-01-04",
+        "2023-01-10",
+        "2023-01-11",
+        "not a date",
+        None,
+    ]
+    cadence = watch_cadence(pd.Series(dates))
+
+    assert cadence["watches"] == 6
+    assert cadence["active_days"] == 5
+    streak = cadence["streaks"].iloc[0]
+    assert (streak["Start"], streak["End"], streak["Days"]) == (
+        pd.Timestamp("2023-01-02"),
+        pd.Timestamp("2023-01-04"),
+        3,
+    )
+    gap = cadence["gaps"].iloc[0]
+    assert (gap["Start"], gap["End"], gap["Days"]) == (
+        pd.Timestamp("2023-01-05"),
+        pd.Timestamp("2023-01-09"),
+        5,
+    )
+    assert cadence["weekdays"].to_dict() == {
+        "Monday": 1,
+        "Tuesday": 3,
+        "Wednesday": 2,
+        "Thursday": 0,
+        "Friday": 0,
+        "Saturday": 0,
+        "Sunday": 0,
+    }
+    assert cadence["months"]["January"] == 6
+    assert cadence["months"].sum() == 6
+
+
+def test_top_runs_longest_then_earliest():
+    # three one-day streaks and a two-day one
+    dates = ["2023-01-01", "2023-01-03", "2023-01-05", "2023-01-07", "2023-01-08"]
+    streaks = watch_cadence(pd.Series(dates), top=3)["streaks"]
+    assert streaks["Days"].tolist() == [2, 1, 1]
+    assert streaks["Start"].tolist()[1:] == [pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-03")]
+
+
+def test_empty_diary():
+    cadence = watch_cadence(pd.Series([], dtype=object))
+    assert cadence["watches"] == 0 and cadence["active_days"] == 0
+    assert cadence["streaks"].empty and cadence["gaps"].empty
+    assert cadence["weekdays"].sum() == 0
@@ -0,0 +1,77 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from utils import checkpoints
+from utils.checkpoints import upload_checkpoint, upload_digest
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def digest(text):
+    return upload_digest(io.BytesIO(text.encode()))
+
+
+def test_same_upload_is_built_once(checkpoint_dir):
+    builds = []
+    lock = threading.Lock()
+
+    def build():
+        with lock:
+            builds.append(1)
+        time.sleep(0.2)
+        return pd.DataFrame({"a": [1, 2, 3]})
+
+    with ThreadPoolExecutor(8) as pool:
+        frames = list(pool.map(lambda _: upload_checkpoint("x", digest("same"), build), range(8)))
+
+    assert len(builds) == 1
+    assert all(frame["a"].tolist() == [1, 2, 3] for frame in frames)
+    # only the checkpoint is left, no lock or temporary file
+    assert os.listdir(checkpoint_dir / "x") == [f"CHECKPOINT1-{digest('same')}.parquet"]
+
+
+def test_different_uploads_do_not_wait_on_each_other():
+    def build():
+        time.sleep(0.5)
+        return pd.DataFrame({"a": [1]})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: upload_checkpoint("x", digest(str(i)), build), range(4)))
+    assert time.perf_counter() - start < 1.5
+
+
+def test_least_recently_used_checkpoints_are_pruned(checkpoint_dir, monkeypatch):
+    monkeypatch.setattr(checkpoints, "MAX_UPLOAD_CHECKPOINTS", 2)
+    frame = pd.DataFrame({"a": [1]})
+    for i, name in enumerate(["a", "b"]):
+        upload_checkpoint("x", digest(name), lambda: frame)
+        path = checkpoints.checkpoint_path("x", f"CHECKPOINT1-{digest(name)}")
+        os.utime(path, (i, i))
+    # reading "a" makes it the most recently used, "b" goes when "c" arrives
+    upload_checkpoint("x", digest("a"), lambda: pytest.fail("rebuilt"))
+    upload_checkpoint("x", digest("c"), lambda: frame)
+
+    names = set(os.listdir(checkpoint_dir / "x"))
+    assert names == {f"CHECKPOINT1-{digest(name)}.parquet" for name in ["a", "c"]}
+
+
+def test_failed_write_leaves_no_file(checkpoint_dir):
+    class Broken(pd.DataFrame):
+        def to_parquet(self, *args, **kwargs):
+            raise RuntimeError("disk full")
+
+    path = checkpoints.checkpoint_path("x", "CHECKPOINT1-broken")
+    with pytest.raises(RuntimeError):
+        checkpoints.write_checkpoint(Broken({"a": [1]}), path)
+    assert os.listdir(checkpoint_dir / "x") == []
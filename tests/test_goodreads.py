@@ -0,0 +1,90 @@
+import io
+
+import pandas as pd
+import pytest
+
+from utils.goodreads import (
+    ALL,
+    COLUMNS,
+    author_cube,
+    load_books,
+    read_export,
+    reading_cube,
+    top_authors,
+    yearly_totals,
+)
+
+
+def export(rows):
+    # a Goodreads export with the report columns, ISBN13 quoted the way Goodreads writes it
+    frame = pd.DataFrame(
+        [
+            {
+                "Title": title,
+                "Author": author,
+                "My Rating": 4,
+                "Average Rating": rating,
+                "Publisher": "Publisher",
+                "Binding": "Paperback",
+                "Number of Pages": pages,
+                "Original Publication Year": 2000,
+                "Date Read": date,
+                "Bookshelves": shelves,
+                "Exclusive Shelf": shelf,
+                "ISBN13": '="9780000000000"',
+            }
+            for title, author, rating, pages, date, shelves, shelf in rows
+        ],
+        columns=COLUMNS,
+    )
+    return io.StringIO(frame.to_csv(index=False))
+
+
+ROWS = [
+    ("Dune (Dune, #1)", "Frank Herbert", 4.2, 600, "2021/01/05", "scifi", "read"),
+    ("Emma", "Jane Austen", 4.0, 400, "2021/01/20", "classics", "read"),
+    ("Persuasion", "Jane Austen", 4.1, 250, "2021/03/02", "classics", "read"),
+    ("Dune Messiah", "Frank Herbert", 3.9, 300, "2022/06/11", "scifi", "read"),
+    ("Unread", "Somebody", 3.0, 100, "", "", "to-read"),
+    ("Sense and Sensibility", "Jane Austen", 4.0, 350, "2022/07/01", "classics", "read"),
+]
+
+
+def test_read_export_chunked_matches_whole():
+    whole = read_export(export(ROWS))
+    chunked = read_export(export(ROWS), chunksize=2)
+    pd.testing.assert_frame_equal(whole, chunked)
+
+    assert len(whole) == 5  # the to-read book is dropped
+    assert whole["Title"].iloc[0] == "Dune"
+    assert whole["ISBN13"].iloc[0] == "9780000000000"
+    assert whole["Year"].tolist() == [2021, 2021, 2021, 2022, 2022]
+    assert whole["Author"].dtype == "category"
+    assert set(whole["Author"].cat.categories) == {"Frank Herbert", "Jane Austen"}
+
+
+def test_load_books_rejects_other_csvs():
+    with pytest.raises(ValueError, match="missing columns"):
+        load_books(io.StringIO("Name,Year\nx,2000\n"))
+
+
+def test_reading_cube_and_yearly_totals():
+    cube = reading_cube(read_export(export(ROWS)))
+    assert len(cube) == 24  # every month of 2021 and 2022
+    assert cube.loc[(2021, 1), "Books"] == 2
+    assert cube.loc[(2021, 1), "Number of Pages"] == 1000
+    assert cube.loc[(2021, 2), "Books"] == 0
+
+    yearly = yearly_totals(cube)
+    assert yearly["Books"].tolist() == [3, 2]
+    assert yearly["Number of Pages"].tolist() == [1250, 650]
+    assert yearly.loc[2022, "Average Rating"] == pytest.approx(3.95)
+
+
+def test_author_cube_filters():
+    cube = author_cube(read_export(export(ROWS)))
+    assert top_authors(cube).to_dict() == {"Jane Austen": 3, "Frank Herbert": 2}
+    assert top_authors(cube, shelf="classics").to_dict() == {"Jane Austen": 3}
+    assert top_authors(cube, year="2021").to_dict() == {"Jane Austen": 2}
+    assert top_authors(cube, shelf="classics", year="2022").empty  # read only once
+    assert top_authors(cube, shelf="unknown", year=ALL).empty
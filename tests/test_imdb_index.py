@@ -0,0 +1,77 @@
+import pandas as pd
+
+from utils.imdb_index import IMDbIndex, build_imdb_index, enrich_from_index
+from utils.omdb import OMDB_FIELDS
+
+
+def write_tsv(path, header, rows):
+    path.write_text("\n".join("\t".join(row) for row in [header, *rows]) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def build(tmp_path, names=True):
+    basics = write_tsv(
+        tmp_path / "basics.tsv",
+        ["tconst", "titleType", "primaryTitle", "originalTitle", "isAdult", "startYear", "endYear", "runtimeMinutes", "genres"],
+        [
+            ["tt1", "movie", "Amélie", "Le Fabuleux Destin d'Amélie Poulain", "0", "2001", "\\N", "122", "Comedy,Romance"],
+            ["tt2", "movie", "Heat", "Heat", "0", "1995", "\\N", "170", "Crime,Drama"],
+            ["tt3", "movie", "Heat", "Heat", "0", "1995", "\\N", "\\N", "Drama"],  # fewer votes
+            ["tt4", "tvSeries", "Heat", "Heat", "0", "1995", "\\N", "50", "Drama"],
+            ["tt5", "movie", "Undated", "Undated", "0", "\\N", "\\N", "90", "Drama"],
+        ],
+    )
+    ratings = write_tsv(
+        tmp_path / "ratings.tsv",
+        ["tconst", "averageRating", "numVotes"],
+        [["tt1", "8.3", "780000"], ["tt2", "8.3", "690000"], ["tt3", "5.0", "12"]],
+    )
+    crew = write_tsv(
+        tmp_path / "crew.tsv",
+        ["tconst", "directors", "writers"],
+        [["tt1", "nm1", "\\N"], ["tt2", "nm2,nm3", "\\N"], ["tt3", "\\N", "\\N"]],
+    )
+    people = write_tsv(
+        tmp_path / "names.tsv",
+        ["nconst", "primaryName"],
+        [["nm1", "Jean-Pierre Jeunet"], ["nm2", "Michael Mann"], ["nm3", "Someone Else"]],
+    )
+    directory = str(tmp_path / "index")
+    count = build_imdb_index(basics, ratings, crew, people if names else None, directory)
+    return count, IMDbIndex(directory)
+
+
+def test_build_and_lookup(tmp_path):
+    count, index = build(tmp_path)
+    # Amélie under both of its titles, one Heat, no series and no undated film
+    assert count == len(index) == 3
+
+    found = index.lookup(
+        ["  HEAT ", "le fabuleux destin d'amélie poulain", "Unknown", "Heat"],
+        [1995, "2001", 2001, 1996],
+    )
+    assert list(found.columns) == OMDB_FIELDS
+    assert found.index.tolist() == [0, 1]
+    assert found.loc[0, "Runtime"] == 170  # the film with more votes wins
+    assert found.loc[0, "imdbVotes"] == 690000
+    assert found.loc[0, "Genre"] == "Crime, Drama"
+    assert found.loc[0, "Director"] == "Michael Mann, Someone Else"
+    assert found.loc[1, "imdbRating"] == 8.3
+    assert found.loc[1, "Director"] == "Jean-Pierre Jeunet"
+
+
+def test_without_names_directors_are_empty(tmp_path):
+    _, index = build(tmp_path, names=False)
+    assert index.lookup(["Heat"], [1995])["Director"].isna().all()
+
+
+def test_enrich_from_index_splits_known_movies(tmp_path):
+    _, index = build(tmp_path)
+    movie_df = pd.DataFrame(
+        {"Name": ["Unknown", "Heat", "Amélie"], "Year": [2000, 1995, 2001]},
+        index=[10, 20, 30],
+    )
+    known, left = enrich_from_index(movie_df, index)
+    assert known.index.tolist() == [20, 30]
+    assert known["Runtime"].tolist() == [170, 122]
+    assert left.index.tolist() == [10]
@@ -0,0 +1,96 @@
+import io
+
+import pandas as pd
+
+from utils.letterboxd import LEADERBOARDS, merge_diary, rank_leaderboards, split_new_movies
+from utils.omdb import OMDB_FIELDS, parse_omdb_columns
+
+# CSV checkpoint as written by the first version of the page, no Poster column
+BASELINE_CHECKPOINT = """Name,Year,Letterboxd URI,Rating,Watched Date,Runtime,Genre,Director,Rated,Language,Country,imdbRating,imdbVotes,BoxOffice
+Reservoir Dogs,1992,https://boxd.it/2agc,5,2022-01-08,99 min,"Crime, Thriller",Quentin Tarantino,R,English,United States,8.3,"1,050,000","$2,832,029"
+Jurassic Park,1993,https://boxd.it/2aA2,4,2022-01-08,127 min,"Action, Adventure",Steven Spielberg,PG-13,English,United States,8.2,"1,000,000","$407,185,075"
+Paused Film,2001,https://boxd.it/xxxx,3,,,,,,,,,,
+"""
+
+
+def upload(*rows):
+    return pd.DataFrame(rows, columns=["Name", "Year", "Letterboxd URI", "Rating"])
+
+
+def test_split_new_movies_from_a_baseline_checkpoint():
+    stored_df = parse_omdb_columns(
+        pd.read_csv(io.StringIO(BASELINE_CHECKPOINT), encoding="utf-8", header=0)
+    )
+    movie_df = upload(
+        ("Reservoir Dogs", 1992, "https://boxd.it/2agc", 5),
+        ("Jurassic Park", 1993, "https://boxd.it/2aA2", 4),
+        ("Paused Film", 2001, "https://boxd.it/xxxx", 3),
+        ("New Film", 2020, "https://boxd.it/new", 2),
+    )
+    known_df, new_df = split_new_movies(movie_df, stored_df, OMDB_FIELDS)
+
+    assert list(known_df.index) == [0, 1]
+    assert known_df.loc[0, "Runtime"] == 99
+    assert known_df.loc[1, "Director"] == "Steven Spielberg"
+    assert known_df["Poster"].isna().all()
+    # never enriched rows are fetched again along with the new ones
+    assert list(new_df.index) == [2, 3]
+
+
+def test_split_new_movies_without_some_stored_fields():
+    stored_df = pd.DataFrame({"Name": ["Heat"], "Year": [1995], "Runtime": [170]})
+    movie_df = pd.DataFrame({"Name": ["Heat", "Ronin"], "Year": [1995, 1998]})
+    known_df, new_df = split_new_movies(movie_df, stored_df, ["Runtime", "Poster"])
+    assert known_df["Runtime"].tolist() == [170]
+    assert known_df["Poster"].isna().all()
+    assert new_df["Name"].tolist() == ["Ronin"]
+
+
+def test_merge_diary_counts_rewatches():
+    ratings_df = pd.DataFrame(
+        {
+            "Date": ["2022-01-01"] * 3,
+            "Name": ["Heat", "Heat", "Ronin"],
+            "Year": [1995, 2021, 1998],
+            "Rating": [5, 2, 4],
+        },
+        index=[10, 11, 12],
+    )
+    diary_df = pd.DataFrame(
+        {
+            "Name": ["Heat", "Heat", "Heat", "Ronin"],
+            "Year": [1995, 1995, 2021, 1998],
+            "Watched Date": ["2020-05-01", "2019-03-02", "2022-07-07", "not a date"],
+        }
+    )
+    movie_df = merge_diary(ratings_df, diary_df)
+
+    assert list(movie_df.index) == [10, 11, 12]
+    # remakes are told apart by their year
+    assert movie_df.loc[10, ["Watched Date", "Last Watched Date", "Watch Count"]].tolist() == [
+        "2019-03-02",
+        "2020-05-01",
+        2,
+    ]
+    assert movie_df.loc[11, "Watch Count"] == 1
+    # diary rows without a valid date do not count as watches
+    assert movie_df.loc[12, "Watch Count"] == 0
+    assert pd.isna(movie_df.loc[12, "Watched Date"])
+
+
+def test_grossing_boards_leave_out_movies_without_a_box_office():
+    movie_df = pd.DataFrame(
+        {
+            "Movie": ["A", "B", "C", "D"],
+            "Your Rating": [8, 6, 10, 4],
+            "IMDB Rating": [7.0, 6.5, 8.1, 5.0],
+            "IMDB Votes": [100, 50, 300, 10],
+            "Runtime (min)": [90, 120, 100, 80],
+            "BoxOffice": pd.array([None, 5_000, None, 2_000_000], dtype="Int64"),
+        }
+    )
+    leaderboards = rank_leaderboards(movie_df)
+    assert list(leaderboards) == list(LEADERBOARDS)
+    assert leaderboards["highest_grossing"].index.tolist() == ["D", "B"]
+    assert leaderboards["lowest_grossing"].index.tolist() == ["B", "D"]
+    assert len(leaderboards["best_rating"]) == 4
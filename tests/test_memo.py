@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from utils.memo import LRUCache, content_hash, memoize_section, section_cache
+
+
+class FakeStreamlit:
+    def __init__(self):
+        self.drawn = []
+
+    def write(self, value):
+        self.drawn.append(value)
+
+
+st = FakeStreamlit()
+runs = []
+
+
+@memoize_section
+def total_section(df: pd.DataFrame):
+    runs.append(1)
+    st.write(int(df["a"].sum()))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    section_cache.clear()
+    st.drawn.clear()
+    runs.clear()
+
+
+def test_replays_without_running_the_section():
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    total_section(df)
+    total_section(df.copy())
+    assert st.drawn == [6, 6]
+    assert len(runs) == 1
+
+
+def test_frame_changed_in_place_is_not_replayed():
+    df = pd.DataFrame({"a": pd.array([1, 2, 3], dtype="Int64")})
+    total_section(df)
+    # same object, shape and dtypes, different values
+    df.loc[0, "a"] = 10
+    total_section(df)
+    assert st.drawn == [6, 15]
+    assert len(runs) == 2
+
+
+@pytest.mark.parametrize(
+    "column",
+    [
+        pd.array([1, None, 3], dtype="Int64"),
+        pd.Categorical(["x", "y", "z"]),
+        ["x", None, "z"],
+        [1.5, 2.5, None],
+        pd.to_datetime(["2020-01-01", None, "2021-01-01"]),
+    ],
+)
+def test_content_hash_sees_every_value(column):
+    df = pd.DataFrame({"a": column})
+    changed = df.copy()
+    changed.iloc[2, 0] = changed.iloc[0, 0]
+    assert content_hash(df) == content_hash(df.copy())
+    assert content_hash(df) != content_hash(changed)
+
+
+def test_content_hash_sees_names_and_index():
+    df = pd.DataFrame({"a": [1, 2]})
+    assert content_hash(df) != content_hash(df.rename(columns={"a": "b"}))
+    assert content_hash(df) != content_hash(df.set_axis([5, 6]))
+    assert content_hash(df["a"]) != content_hash(df["a"].rename("b"))
+
+
+def test_lru_cache_evicts_by_size():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", 1, 4)
+    cache.set("b", 2, 4)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.set("c", 3, 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.set("huge", 4, 11)
+    assert cache.get("huge") is None
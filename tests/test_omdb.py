@@ -0,0 +1,166 @@
+import pandas as pd
+import pytest
+import requests
+
+from utils import omdb
+from utils.omdb_quota import KeyScheduler, QuotaLedger
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def fake_get(answers, calls):
+    # every call pops the next answer, an exception instance is raised instead
+    def get(url, params=None, timeout=None):
+        calls.append(params)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return FakeResponse(answer)
+
+    return get
+
+
+def test_verify_api_key_rejected(monkeypatch, tmp_path):
+    calls = []
+    answers = [{"Response": "False", "Error": "Invalid API key!"}]
+    monkeypatch.setattr(omdb.requests, "get", fake_get(answers, calls))
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite3"))
+    assert omdb.verify_api_key("abcd1234", ledger=ledger) is False
+    assert ledger.used("abcd1234") == 1
+
+
+def test_verify_api_key_network_error_is_not_a_bad_key(monkeypatch, tmp_path):
+    calls = []
+    answers = [requests.ConnectionError("down"), requests.Timeout("slow")]
+    monkeypatch.setattr(omdb.requests, "get", fake_get(answers, calls))
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite3"))
+    with pytest.raises(requests.RequestException):
+        omdb.verify_api_key("abcd1234", ledger=ledger, retries=1, backoff=0)
+    # the retry is a second request, both are counted
+    assert len(calls) == 2
+    assert ledger.used("abcd1234") == 2
+
+
+def test_verify_api_key_retry_then_valid(monkeypatch, tmp_path):
+    calls = []
+    answers = [requests.ConnectionError("blip"), {"Response": "True", "Title": "Reservoir Dogs"}]
+    monkeypatch.setattr(omdb.requests, "get", fake_get(answers, calls))
+    cache = omdb.OMDBCache(str(tmp_path / "omdb.sqlite3"))
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite3"))
+    assert omdb.verify_api_key("abcd1234", cache=cache, ledger=ledger, retries=1, backoff=0) is True
+    assert ledger.used("abcd1234") == 2
+    # verified keys and the probe's movie are remembered
+    assert omdb.verify_api_key("abcd1234", cache=cache, ledger=ledger) is True
+    assert len(calls) == 2
+    assert cache.get("Reservoir Dogs", 1992)["Title"] == "Reservoir Dogs"
+
+
+def test_verify_api_key_limit_reached_is_valid(monkeypatch, tmp_path):
+    calls = []
+    answers = [{"Response": "False", "Error": "Request limit reached!"}]
+    monkeypatch.setattr(omdb.requests, "get", fake_get(answers, calls))
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite3"), limit=1000)
+    assert omdb.verify_api_key("abcd1234", ledger=ledger) is True
+    assert ledger.remaining("abcd1234") == 0
+
+
+def test_verify_api_key_without_a_verdict_is_not_a_bad_key(monkeypatch):
+    calls = []
+    answers = [{"Response": "False", "Error": "Something went wrong."}]
+    monkeypatch.setattr(omdb.requests, "get", fake_get(answers, calls))
+    with pytest.raises(omdb.OMDBError):
+        omdb.verify_api_key("abcd1234")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_burst_then_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(omdb.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(omdb.time, "sleep", clock.sleep)
+    bucket = omdb.TokenBucket(rate=10, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 0
+    # the burst is used up, the next tokens come at the rate
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.now == pytest.approx(0.2)
+
+
+def test_token_bucket_slower_than_one_request_per_second(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(omdb.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(omdb.time, "sleep", clock.sleep)
+    bucket = omdb.TokenBucket(rate=0.5)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.now == pytest.approx(2)
+
+
+def test_token_bucket_refill_is_capped(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(omdb.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(omdb.time, "sleep", clock.sleep)
+    bucket = omdb.TokenBucket(rate=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60  # idle for a minute, still only `capacity` tokens
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+class FakeSession:
+    def get(self, url, params=None, timeout=None):
+        return FakeResponse({"Response": "True", "Poster": f"https://img/{params['t']}.jpg"})
+
+
+def test_resolve_posters_share_the_client_limiter():
+    client = omdb.OMDBClient("key")
+    client.session = FakeSession()
+    client.limiter = CountingLimiter()
+    posters = omdb.resolve_posters([("Heat", 1995), ("Ronin", 1998), ("Heat", 1995)], client)
+    assert posters == {("Heat", 1995): "https://img/Heat.jpg", ("Ronin", 1998): "https://img/Ronin.jpg"}
+    assert client.limiter.acquired == 2
+
+
+def test_enrich_movies_leaves_movies_pending_once_the_keys_run_out(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / "quota.sqlite3"), limit=2)
+    client = omdb.OMDBClient(scheduler=KeyScheduler(["abcd1234"], ledger), workers=1)
+    client.session = FakeSession()
+    movie_df = pd.DataFrame({"Name": ["Heat", "Ronin", "Alien"], "Year": [1995, 1998, 1979]})
+    enriched, skipped, pending = omdb.enrich_movies(movie_df, client)
+    assert skipped == []
+    assert pending == ["Alien"]
+    assert enriched["Poster"].tolist()[:2] == ["https://img/Heat.jpg", "https://img/Ronin.jpg"]
+    assert enriched["Poster"].isna().tolist() == [False, False, True]
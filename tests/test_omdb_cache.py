@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from utils import omdb_cache
+from utils.omdb_cache import KEY_TTL, OMDBCache
+
+
+class FakeTime:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(omdb_cache.time, "time", clock)
+    return clock
+
+
+def response(title, padding=0):
+    return {"Response": "True", "Title": title, "Plot": "x" * padding}
+
+
+def test_lookups_are_normalized(tmp_path, clock):
+    cache = OMDBCache(str(tmp_path / "omdb.sqlite3"))
+    cache.set("  Amélie ", 2001.0, response("Amélie"))
+    assert cache.get("amélie", "2001")["Title"] == "Amélie"
+    assert cache.get("Amélie", 2002) is None
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = OMDBCache(str(tmp_path / "omdb.sqlite3"), ttl=100)
+    cache.set("Heat", 1995, response("Heat"))
+    clock.now += 100
+    assert cache.get("Heat", 1995) is not None
+    clock.now += 1
+    assert cache.get("Heat", 1995) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    size = len(json.dumps(response("a", 100), separators=(",", ":")))
+    cache = OMDBCache(str(tmp_path / "omdb.sqlite3"), max_bytes=2 * size)
+    cache.set("a", 2000, response("a", 100))
+    clock.now += 1
+    cache.set("b", 2000, response("b", 100))
+    clock.now += 1
+    assert cache.get("a", 2000) is not None  # a is now more recent than b
+    clock.now += 1
+    cache.set("c", 2000, response("c", 100))
+
+    assert cache.get("b", 2000) is None
+    assert cache.get("a", 2000) is not None
+    assert cache.get("c", 2000) is not None
+
+
+def test_verified_keys_expire(tmp_path, clock):
+    cache = OMDBCache(str(tmp_path / "omdb.sqlite3"))
+    assert not cache.is_verified_key("abcd1234")
+    cache.mark_verified_key("abcd1234")
+    assert cache.is_verified_key("abcd1234")
+    clock.now += KEY_TTL + 1
+    assert not cache.is_verified_key("abcd1234")
@@ -0,0 +1,65 @@
+import pytest
+
+from utils import omdb_quota
+from utils.omdb_quota import KeyScheduler, QuotaExhausted, QuotaLedger, next_reset, quota_day
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return QuotaLedger(str(tmp_path / "quota.sqlite3"), limit=3)
+
+
+def test_ledger_counts_per_key_and_day(ledger, monkeypatch):
+    ledger.record("one")
+    ledger.record("one", requests=2)
+    ledger.record("two")
+    assert ledger.used("one") == 3
+    assert ledger.remaining("one") == 0
+    assert ledger.remaining("two") == 2
+
+    # a new UTC day starts from zero
+    monkeypatch.setattr(omdb_quota, "quota_day", lambda now=None: "2999-01-01")
+    assert ledger.used("one") == 0
+
+
+def test_ledger_creates_its_directory(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / "csvs" / "omdb" / "quota.sqlite3"))
+    ledger.record("one")
+    assert ledger.used("one") == 1
+
+
+def test_ledger_mark_exhausted(ledger):
+    ledger.record("one")
+    ledger.mark_exhausted("one")
+    assert ledger.remaining("one") == 0
+
+
+def test_ledger_never_stores_the_key(ledger, tmp_path):
+    ledger.record("secret-key")
+    assert b"secret-key" not in (tmp_path / "quota.sqlite3").read_bytes()
+
+
+def test_scheduler_round_robin_until_exhausted(ledger):
+    ledger.record("one", requests=2)  # one request left
+    scheduler = KeyScheduler(["one", "two", "one"], ledger)
+    assert scheduler.keys == ["one", "two"]
+    assert scheduler.total_remaining() == 4
+
+    keys = [scheduler.acquire() for _ in range(4)]
+    assert keys == ["one", "two", "two", "two"]
+    assert ledger.used("two") == 3
+    with pytest.raises(QuotaExhausted):
+        scheduler.acquire()
+
+
+def test_scheduler_mark_exhausted_skips_the_key(ledger):
+    scheduler = KeyScheduler(["one", "two"], ledger)
+    scheduler.mark_exhausted("one")
+    assert {scheduler.acquire() for _ in range(3)} == {"two"}
+    assert ledger.remaining("one") == 0
+
+
+def test_next_reset_is_the_next_utc_midnight():
+    now = 1_700_000_000  # 2023-11-14 22:13:20 UTC
+    assert quota_day(now) == "2023-11-14"
+    assert next_reset(now).isoformat() == "2023-11-15T00:00:00+00:00"
@@ -0,0 +1,33 @@
+import os
+
+from utils.reports import EnrichOptions, build_report, letterboxd_report
+
+SAMPLES = os.path.abspath("pages/sample-csv")
+
+
+def test_letterboxd_report_from_an_empty_directory(monkeypatch, tmp_path):
+    # nothing under csvs/ yet: the OMDB cache and the quota ledger create their directory
+    monkeypatch.chdir(tmp_path)
+    report = letterboxd_report(
+        os.path.join(SAMPLES, "letterboxd_ratings.csv"),
+        os.path.join(SAMPLES, "letterboxd_diary.csv"),
+    )
+    assert os.path.isdir(tmp_path / "csvs")
+    # no API key and no IMDb index, every movie that can be looked up waits for OMDB
+    stats = report["stats"]
+    assert stats["pending"] > 0
+    assert stats["pending"] + stats["skipped"] == stats["movies"]
+
+
+def test_build_report_passes_the_enrich_options(tmp_path):
+    options = EnrichOptions(
+        cache_path=str(tmp_path / "cache" / "omdb.sqlite3"),
+        index_dir=str(tmp_path / "index"),
+    )
+    paths = (
+        os.path.join(SAMPLES, "letterboxd_ratings_2.csv"),
+        os.path.join(SAMPLES, "letterboxd_diary_1.csv"),
+    )
+    report = build_report("letterboxd", paths, enrich=options)
+    assert os.path.exists(options.cache_path)
+    assert report["sources"] == ["letterboxd_ratings_2.csv", "letterboxd_diary_1.csv"]
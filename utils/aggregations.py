@@ -0,0 +1,59 @@
+"""
+DESCRIPTION: Aggregation helpers shared by the report pages.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+
+def bucket_long_tail(
+    counts: pd.Series, share: float = None, top_k: int = None, other_label="Others"
+):
+    """
+    Keep the largest counts and sum the rest into a single `other_label` entry.
+
+    A value is kept when its share of the total is at least `share` and it is among the
+    `top_k` largest; either limit can be left out. Done in one vectorized pass, the
+    result is sorted descending with the remainder last and keeps the Series and index names.
+    """
+    counts = counts.sort_values(ascending=False)
+    keep = np.ones(len(counts), dtype=bool)
+    if share is not None:
+        keep &= (counts / counts.sum()).to_numpy() >= share
+    if top_k is not None:
+        keep &= np.arange(len(counts)) < top_k
+
+    bucketed = counts[keep]
+    remainder = counts[~keep].sum()
+    if remainder:
+        others = pd.Series([remainder], index=[other_label], name=counts.name)
+        bucketed = pd.concat([bucketed, others])
+        bucketed.index.name = counts.index.name
+    return bucketed
+
+
+def rank_top_k(df: pd.DataFrame, boards: dict, k: int = 10):
+    """
+    Compute several top-K/bottom-K leaderboards of `df` together.
+
+    `boards` maps a name to `(by, largest, columns)`: the ranking keys (later keys break
+    ties of earlier ones), whether the largest or smallest values win, and the columns
+    to keep. Rows are ranked by a stable sort of their key columns, missing values last
+    and ties in their original order, so a board never has more than `k` rows. When the
+    first key has more than `k` values, only the rows that reach the k-th of them are
+    sorted, the frame is never fully sorted or copied.
+    """
+    ranked = {}
+    for name, (by, largest, columns) in boards.items():
+        # rank by position so a non unique index can not pull in extra rows
+        keys = df[by].reset_index(drop=True)
+        first = keys[by[0]]
+        if first.count() > k:
+            border = (first.nlargest if largest else first.nsmallest)(k).iloc[-1]
+            keys = keys[first >= border] if largest else keys[first <= border]
+        top = keys.sort_values(
+            by, ascending=not largest, na_position="last", kind="mergesort"
+        ).head(k)
+        ranked[name] = df.iloc[top.index][columns]
+    return ranked
@@ -0,0 +1,103 @@
+"""
+DESCRIPTION: Viewing cadence of a Letterboxd diary. Watch dates are binned to days with one `bincount` over the diary's date span, streaks of consecutive watching days and the gaps between them come from run-length encoding that daily series with `diff`, and weekday and month counts are `bincount`s too, so everything is linear in the number of diary entries plus the days they span.
+"""
+
+
+import calendar
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+WEEKDAYS = list(calendar.day_name)
+MONTHS = list(calendar.month_name)[1:]
+EPOCH_WEEKDAY = 3  # 1970-01-01, day 0 of datetime64[D], was a Thursday
+
+
+def watch_days(watched_dates):
+    # diary dates as days since the epoch, entries without a date are dropped
+    dates = pd.to_datetime(
+        pd.Series(watched_dates, dtype=object), format="%Y-%m-%d", errors="coerce"
+    ).dropna()
+    return dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def run_lengths(active):
+    """Start positions and lengths of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def _day(day) -> pd.Timestamp:
+    return pd.Timestamp(np.datetime64(int(day), "D"))
+
+
+def top_runs(starts, lengths, first_day, k: int = 10):
+    # the k longest runs, longest (then earliest) first, without sorting all of them
+    if len(lengths) > k:
+        # every run tied with the k-th longest stays, the earliest of them win below
+        border = -np.partition(-lengths, k - 1)[k - 1]
+        keep = lengths >= border
+        starts, lengths = starts[keep], lengths[keep]
+    order = np.lexsort((starts, -lengths))[:k]
+    starts, lengths = starts[order] + first_day, lengths[order]
+    return pd.DataFrame(
+        {
+            "Start": [_day(start) for start in starts],
+            "End": [_day(start + length - 1) for start, length in zip(starts, lengths)],
+            "Days": lengths,
+        }
+    )
+
+
+def watch_cadence(watched_dates, top: int = 10):
+    """
+    Streaks, gaps, weekday and month counts of a diary's watch dates.
+
+    A streak is a run of consecutive days with at least one watch, a gap a run of days
+    without any between two watches. `streaks` and `gaps` hold the `top` longest of
+    each (Start, End, Days), longest first. `weekdays` and `months` count watches, not
+    films, so rewatches count every time.
+    """
+    days = watch_days(watched_dates)
+    cadence = {
+        "watches": len(days),
+        "weekdays": pd.Series(0, index=WEEKDAYS, name="Watches"),
+        "months": pd.Series(0, index=MONTHS, name="Watches"),
+    }
+    if not len(days):
+        no_runs = pd.DataFrame(columns=["Start", "End", "Days"])
+        cadence.update(active_days=0, streaks=no_runs, gaps=no_runs)
+        return cadence
+
+    first_day = days.min()
+    per_day = np.bincount(days - first_day)
+    active = per_day > 0
+    cadence["active_days"] = int(active.sum())
+    cadence["streaks"] = top_runs(*run_lengths(active), first_day, top)
+    cadence["gaps"] = top_runs(*run_lengths(~active), first_day, top)
+
+    cadence["weekdays"][:] = np.bincount((days + EPOCH_WEEKDAY) % 7, minlength=7)
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+    cadence["months"][:] = np.bincount(months, minlength=12)
+    return cadence
+
+
+def cadence_charts(cadence: dict):
+    return {
+        "weekdays": px.bar(
+            cadence["weekdays"].rename_axis("Weekday").reset_index(),
+            x="Weekday",
+            y="Watches",
+            color="Watches",
+            color_continuous_scale=px.colors.sequential.Oranges,
+        ),
+        "months": px.bar(
+            cadence["months"].rename_axis("Month").reset_index(),
+            x="Month",
+            y="Watches",
+            color="Watches",
+            color_continuous_scale=px.colors.sequential.Oranges,
+        ),
+    }
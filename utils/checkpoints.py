@@ -0,0 +1,144 @@
+"""
+DESCRIPTION: Checkpoint storage shared by the report pages. Cleaned dataframes are written as Parquet instead of CSV so dtypes (nullable ints, dates, floats) survive the round trip, nothing is re-parsed from text on a rerun, and a section can load only the columns it uses. Upload checkpoints are content-addressed: the file name carries a hash of the uploaded bytes, so every distinct upload gets its own checkpoint and identical uploads share one. Files are written to a temporary name and renamed into place, so a reader never sees half a file, building a checkpoint holds a lock of its own key only, and only the most recently used upload checkpoints are kept.
+"""
+
+
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CHECKPOINT_DIR = "csvs"
+MAX_UPLOAD_CHECKPOINTS = 32  # per platform, least recently used ones are removed
+UPLOAD_CHECKPOINT = re.compile(r"CHECKPOINT1-[0-9a-f]{64}\.parquet")
+
+
+def checkpoint_path(platform: str, name: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, platform, f"{name}.parquet")
+
+
+def upload_digest(upload) -> str:
+    """SHA-256 of an uploaded file's bytes, `upload` is a Streamlit upload or a path."""
+    if isinstance(upload, (str, os.PathLike)):
+        with open(upload, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    return hashlib.sha256(upload.getvalue()).hexdigest()
+
+
+def write_checkpoint(df: pd.DataFrame, path: str):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # written next to the target and renamed over it, the rename is atomic on one filesystem
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".parquet")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            df.to_parquet(file, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_checkpoint(path: str, columns=None) -> pd.DataFrame:
+    # Parquet is columnar, columns that are not requested are never read from disk
+    return pd.read_parquet(path, columns=columns)
+
+
+def _lock(file):
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock(file):
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def checkpoint_lock(path: str):
+    """
+    Exclusive lock of one checkpoint, held on a `.lock` file next to it. The lock file is
+    removed again while still held; a waiter that then gets the lock of the removed file
+    sees it is gone and locks the current one instead.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_path = f"{path}.lock"
+    while True:
+        lock = open(lock_path, "a+b")
+        _lock(lock)
+        try:
+            current = os.stat(lock_path).st_ino == os.fstat(lock.fileno()).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        _unlock(lock)
+        lock.close()
+    try:
+        yield
+    finally:
+        # an open file can not be removed on Windows, the lock file stays there
+        if fcntl is not None:
+            os.remove(lock_path)
+        _unlock(lock)
+        lock.close()
+
+
+def prune_checkpoints(platform: str, keep: int = MAX_UPLOAD_CHECKPOINTS):
+    """Remove all but the `keep` most recently used upload checkpoints of a platform."""
+    directory = os.path.join(CHECKPOINT_DIR, platform)
+    paths = [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if UPLOAD_CHECKPOINT.fullmatch(name)
+    ]
+    used = []
+    for path in paths:
+        try:
+            used.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            pass  # pruned by another session
+    for _, path in sorted(used, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def upload_checkpoint(platform: str, digest: str, build, columns=None) -> pd.DataFrame:
+    """
+    Load the checkpoint of the upload with `upload_digest` `digest`, calling `build()` for
+    the dataframe to store the first time these exact bytes are seen.
+
+    An existing checkpoint is read without locking. Otherwise the key's lock is taken and
+    the file checked again, so concurrent sessions with the same upload build it once and
+    the others wait and read it, while different uploads never wait on each other. Only
+    the MAX_UPLOAD_CHECKPOINTS most recently read or written uploads are kept on disk.
+    """
+    path = checkpoint_path(platform, f"CHECKPOINT1-{digest}")
+    try:
+        df = read_checkpoint(path, columns=columns)
+        os.utime(path)  # most recently used, pruned last
+        return df
+    except FileNotFoundError:
+        pass
+    with checkpoint_lock(path):
+        if not os.path.exists(path):
+            write_checkpoint(build(), path)
+            prune_checkpoints(platform, MAX_UPLOAD_CHECKPOINTS)
+    return read_checkpoint(path, columns=columns)
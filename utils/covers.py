@@ -0,0 +1,122 @@
+"""
+DESCRIPTION: Open Library cover lookup for the Goodreads report. A cover is validated with a HEAD request using `?default=false`, which makes Open Library answer 404 instead of a placeholder image, so no image is downloaded to check it. All ISBNs a report needs are looked up concurrently on one pooled session, and every answer, missing covers included, is memoized in a SQLite file so a report costs no request once its covers have been seen.
+"""
+
+
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from utils.http_session import make_session
+
+COVER_URL = "https://covers.openlibrary.org/b/isbn/{isbn}-L.jpg"
+DEFAULT_COVER = "https://islandpress.org/sites/default/files/default_book_cover_2015.jpg"
+DEFAULT_CACHE_PATH = "csvs/covers_cache.sqlite3"
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 5  # seconds per request
+COVER_TTL = 90 * 24 * 60 * 60  # covers that exist rarely go away
+MISSING_TTL = 7 * 24 * 60 * 60  # covers get uploaded, check missing ones again weekly
+
+
+def cover_url(isbn) -> str:
+    return COVER_URL.format(isbn=isbn)
+
+
+def is_isbn13(isbn) -> bool:
+    return isinstance(isbn, str) and len(isbn) == 13 and isbn.isdigit()
+
+
+class CoverCache:
+    """ISBN -> cover URL, or NULL when Open Library has no cover for it."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS covers (
+                    isbn TEXT PRIMARY KEY,
+                    url TEXT,
+                    checked_at REAL NOT NULL
+                )"""
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, isbns):
+        """Return {isbn: url or None} for the ISBNs with an entry that has not expired."""
+        isbns = list(isbns)
+        if not isbns:
+            return {}
+        now = time.time()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT isbn, url, checked_at FROM covers WHERE isbn IN ({','.join('?' * len(isbns))})",
+                isbns,
+            ).fetchall()
+        return {
+            isbn: url
+            for isbn, url, checked_at in rows
+            if now - checked_at <= (COVER_TTL if url else MISSING_TTL)
+        }
+
+    def set_many(self, covers: dict):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO covers VALUES (?, ?, ?)",
+                [(isbn, url, now) for isbn, url in covers.items()],
+            )
+
+
+def check_cover(isbn, session, timeout: float = DEFAULT_TIMEOUT):
+    """
+    Return the cover URL of `isbn`, or None when Open Library has none. Raises
+    requests.RequestException on network errors and server errors, which are not cached.
+    """
+    url = cover_url(isbn)
+    response = session.head(
+        url, params={"default": "false"}, timeout=timeout, allow_redirects=True
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return url
+
+
+def resolve_covers(
+    isbns,
+    cache: CoverCache = None,
+    workers: int = DEFAULT_WORKERS,
+    timeout: float = DEFAULT_TIMEOUT,
+):
+    """
+    Resolve the cover URL of every ISBN concurrently, None when there is no cover.
+    Invalid ISBNs cost no request, lookups that fail are None for this call only.
+    """
+    isbns = list(dict.fromkeys(isbns))
+    covers = {isbn: None for isbn in isbns if not is_isbn13(isbn)}
+    wanted = [isbn for isbn in isbns if is_isbn13(isbn)]
+    if cache is not None:
+        covers.update(cache.get_many(wanted))
+    missing = [isbn for isbn in wanted if isbn not in covers]
+    if missing:
+        session = make_session(workers)
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+            futures = {
+                isbn: pool.submit(check_cover, isbn, session, timeout) for isbn in missing
+            }
+        checked = {
+            isbn: future.result()
+            for isbn, future in futures.items()
+            if future.exception() is None
+        }
+        if cache is not None:
+            cache.set_many(checked)
+        covers.update(checked)
+    # in input order whatever answered, equal inputs give equal dicts
+    return {isbn: covers.get(isbn) for isbn in isbns}
@@ -0,0 +1,268 @@
+"""
+DESCRIPTION: Data preparation and aggregates of the Goodreads report that do not depend on Streamlit, shared by the report page and the batch report engine.
+"""
+
+
+import calendar
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# columns of the Goodreads export the report uses
+COLUMNS = [
+    "Title",
+    "Author",
+    "My Rating",
+    "Average Rating",
+    "Publisher",
+    "Binding",
+    "Number of Pages",
+    "Original Publication Year",
+    "Date Read",
+    "Bookshelves",
+    "Exclusive Shelf",
+    "ISBN13",
+]
+
+# parsed types of the report columns, Date Read is parsed with DATE_FORMAT after reading
+DTYPES = {
+    "Title": "object",
+    "Author": "object",
+    "My Rating": "Int64",
+    "Average Rating": "float64",
+    "Publisher": "object",
+    "Binding": "object",
+    "Number of Pages": "Int64",
+    "Original Publication Year": "Int64",
+    "Date Read": "object",
+    "Bookshelves": "object",
+    "Exclusive Shelf": "object",
+    "ISBN13": "object",
+}
+TEXT_COLUMNS = ["Title", "Author", "Publisher", "Binding", "Bookshelves", "Exclusive Shelf", "ISBN13"]
+# few distinct values repeated over the library, stored once as categories
+CATEGORY_COLUMNS = ["Author", "Publisher", "Binding", "Bookshelves"]
+DATE_FORMAT = "%Y/%m/%d"
+CHUNK_ROWS = 50_000
+
+MONTH_LABELS = np.array([f"{month:02d}-{calendar.month_name[month]}" for month in range(1, 13)])
+
+PAGE_RANGES = ([0, 100, 500, 1000, float("inf")], ["<100", "100-500", "500-1000", ">1000"])
+
+
+def missing_columns(source):
+    """Report columns absent from an export, only its header row is read."""
+    header = pd.read_csv(source, encoding="utf-8", nrows=0)
+    _rewind(source)
+    return set(COLUMNS) - set(header.columns)
+
+
+def _rewind(source):
+    # uploads are file objects, the next read has to start at the header again
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def clean_chunk(chunk: pd.DataFrame):
+    """Keep the read books of a chunk of the export and clean them."""
+    chunk = chunk[chunk["Exclusive Shelf"] == "read"].copy()
+    # text before the first "(", "Title (Series, #3)" -> "Title"
+    chunk["Title"] = chunk["Title"].str.split("(", n=1).str[0]
+    for column in TEXT_COLUMNS:
+        chunk[column] = chunk[column].str.strip()
+    chunk["ISBN13"] = chunk["ISBN13"].str[2:-1]  # the export quotes it as ="9780061020612"
+    chunk["Date Read"] = pd.to_datetime(chunk["Date Read"], format=DATE_FORMAT, errors="coerce")
+    chunk["Year"] = chunk["Date Read"].dt.year.astype("Int64")
+    return chunk.astype({column: "category" for column in CATEGORY_COLUMNS})
+
+
+def read_export(source, chunksize: int = CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Read and clean the read books of a Goodreads export chunk by chunk.
+
+    Only the report columns are parsed, with their final dtypes, and a chunk is reduced
+    to its read books before the next one is read, so memory is bounded by the chunk
+    size plus the kept books rather than by the whole export. The categories of every
+    chunk are unioned so the result keeps categorical columns.
+    """
+    chunks = [
+        clean_chunk(chunk)
+        for chunk in pd.read_csv(
+            source,
+            encoding="utf-8",
+            usecols=COLUMNS,
+            dtype=DTYPES,
+            chunksize=chunksize,
+        )
+    ]
+    if not chunks:
+        _rewind(source)
+        chunks = [clean_chunk(pd.read_csv(source, usecols=COLUMNS, dtype=DTYPES))]
+    for column in CATEGORY_COLUMNS:
+        categories = union_categoricals([chunk[column] for chunk in chunks]).categories
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)[[*COLUMNS, "Year"]]
+
+
+def load_books(path) -> pd.DataFrame:
+    """Validate, read and clean a Goodreads export, raises ValueError for other CSV files."""
+    missing = missing_columns(path)
+    if missing:
+        raise ValueError(f"Not a Goodreads export, missing columns: {sorted(missing)}")
+    return read_export(path)
+
+
+def library_totals(books_df: pd.DataFrame):
+    return {
+        "books": len(books_df),
+        "pages": int(books_df["Number of Pages"].sum()),
+        "authors": books_df["Author"].nunique(),
+    }
+
+
+def read_years(books_df: pd.DataFrame):
+    # the page turns "Year" into strings for its filters, the read date is always a datetime
+    return books_df["Date Read"].dt.year.astype("Int64").rename("Year")
+
+
+def books_per_year(books_df: pd.DataFrame):
+    counts = read_years(books_df).value_counts().sort_index()
+    return counts.rename_axis("Year").reset_index(name="Count")
+
+
+def reading_cube(books_df: pd.DataFrame):
+    """
+    Books, pages and Goodreads rating totals of the books read in every (Year, Month).
+
+    One grouped aggregation, reindexed over every month of every year with a read book
+    so months without one are 0 instead of missing. The monthly and yearly charts are
+    all derived from it.
+    """
+    read = books_df["Date Read"]
+    cube = books_df.groupby(
+        [read_years(books_df), read.dt.month.astype("Int64").rename("Month")]
+    ).agg(
+        **{
+            "Books": ("Title", "size"),
+            "Number of Pages": ("Number of Pages", "sum"),
+            "Rating Sum": ("Average Rating", "sum"),
+            "Rated": ("Average Rating", "count"),
+        }
+    )
+    years = cube.index.get_level_values("Year").unique().sort_values()
+    grid = pd.MultiIndex.from_product([years, range(1, 13)], names=["Year", "Month"])
+    return cube.reindex(grid, fill_value=0)
+
+
+def yearly_totals(cube: pd.DataFrame):
+    """Books, pages read and average Goodreads rating of the books read in every year."""
+    yearly = cube.groupby(level="Year").sum()
+    yearly["Average Rating"] = yearly["Rating Sum"] / yearly["Rated"].replace(0, np.nan)
+    return yearly[["Books", "Number of Pages", "Average Rating"]]
+
+
+def monthly_pages(cube: pd.DataFrame):
+    # one row per (Year, Month) with the month labelled like "01-January"
+    monthly = cube["Number of Pages"].reset_index()
+    monthly["Month"] = MONTH_LABELS[monthly["Month"].to_numpy(dtype=int) - 1]
+    return monthly
+
+
+ALL = "All"
+
+
+def author_cube(books_df: pd.DataFrame):
+    """
+    Books read per (Shelf, Year, Author), plus the ALL marginals over shelves, years
+    and both, as one count Series with a sorted MultiIndex.
+
+    Built once per library, every filter combination of the authors chart is then a
+    lookup in it. Years are the "%Y" strings of the read dates.
+    """
+    counts = pd.DataFrame(
+        {
+            # as objects, categoricals would count every unseen shelf and author pair
+            "Shelf": books_df["Bookshelves"].astype(object).fillna(""),
+            "Year": books_df["Date Read"].dt.strftime("%Y").fillna(""),
+            "Author": books_df["Author"].astype(object),
+        }
+    ).value_counts()
+    all_shelves = pd.concat(
+        {ALL: counts.groupby(level=["Year", "Author"]).sum()}, names=["Shelf"]
+    )
+    all_years = pd.concat(
+        {ALL: counts.groupby(level=["Shelf", "Author"]).sum()}, names=["Year"]
+    ).reorder_levels(["Shelf", "Year", "Author"])
+    everything = pd.concat(
+        {(ALL, ALL): counts.groupby(level="Author").sum()}, names=["Shelf", "Year"]
+    )
+    return pd.concat([counts, all_shelves, all_years, everything]).sort_index()
+
+
+def top_authors(cube: pd.Series, shelf=ALL, year=ALL, N: int = 10):
+    """The N most read authors for a shelf and year, only authors read more than once."""
+    try:
+        counts = cube.loc[(shelf, year)]
+    except KeyError:
+        counts = cube.iloc[:0].droplevel(["Shelf", "Year"])
+    return counts[counts > 1].nlargest(N)
+
+
+# name -> (column, largest wins) of every book picked for the highlight row
+HIGHLIGHTS = {
+    "oldest": ("Original Publication Year", False),
+    "newest": ("Original Publication Year", True),
+    "first": ("Date Read", False),
+    "last": ("Date Read", True),
+    "longest": ("Number of Pages", True),
+    "shortest": ("Number of Pages", False),
+}
+
+
+def book_highlights(books_df: pd.DataFrame):
+    """
+    The full row of every HIGHLIGHTS book, ISBN included, picked with one idxmin/idxmax
+    per column instead of sorting the library. Missing values are ignored, a highlight
+    whose column is empty for every book is left out.
+    """
+    highlights = {}
+    for name, (column, largest) in HIGHLIGHTS.items():
+        # by position, a non unique index can not pick the wrong row
+        values = books_df[column].reset_index(drop=True)
+        if values.notna().any():
+            highlights[name] = books_df.iloc[values.idxmax() if largest else values.idxmin()]
+    return highlights
+
+
+def rated_books(books_df: pd.DataFrame, N: int, best: bool = True):
+    # the N highest (or lowest) rated books, ties broken by the Goodreads average
+    books_df = books_df[books_df["My Rating"] > 0]
+    books_df = books_df[["Title", "Author", "My Rating", "Average Rating"]]
+    books_df = books_df.sort_values(
+        by=["My Rating", "Average Rating"], ascending=not best
+    )
+    return books_df.set_index("Title").head(N)
+
+
+def rating_counts(books_df: pd.DataFrame):
+    # books per star rating, unrated books (0 stars) left out
+    rating_count = books_df["My Rating"].value_counts().reset_index()
+    rating_count.columns = ["Rating", "Count"]
+    return rating_count[(rating_count["Count"] > 0) & (rating_count["Rating"] > 0)]
+
+
+def page_range_counts(books_df: pd.DataFrame):
+    books_df = books_df[books_df["Number of Pages"] > 0]
+    bins, labels = PAGE_RANGES
+    page_ranges = pd.cut(books_df["Number of Pages"], bins=bins, labels=labels)
+    page_count = page_ranges.value_counts().reset_index()
+    page_count.columns = ["Page Ranges", "Count"]
+    return page_count
+
+
+def publication_years(books_df: pd.DataFrame):
+    # books with no or an invalid publication year are left out
+    years = books_df["Original Publication Year"]
+    return books_df[years.notna() & (years > 0)]
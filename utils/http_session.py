@@ -0,0 +1,18 @@
+"""
+DESCRIPTION: Pooled HTTP sessions shared by the clients that send many concurrent requests (OMDB, Open Library covers).
+"""
+
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 8
+
+
+def make_session(workers: int = DEFAULT_POOL_SIZE):
+    # one pooled connection per worker so the threads do not queue on the adapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
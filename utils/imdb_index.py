@@ -0,0 +1,225 @@
+"""
+DESCRIPTION: Optional offline metadata backend for the Letterboxd report. The public IMDb TSV dumps (title.basics, title.ratings, title.crew and name.basics for director names) are compiled once into a directory of numpy arrays keyed by a hash of the normalized (title, year). The arrays are memory-mapped, so looking up a whole library costs a binary search and no network or OMDB quota. Runtime, Genre, Director, imdbRating and imdbVotes come from the index, the other OMDB fields are not part of the dumps.
+
+USAGE: python -m utils.imdb_index --basics title.basics.tsv.gz --ratings title.ratings.tsv.gz --crew title.crew.tsv.gz [--names name.basics.tsv.gz] [--out csvs/imdb_index]
+
+DATASETS: https://datasets.imdbws.com/ (a small fixture lives in pages/sample-csv/imdb/)
+"""
+
+
+import argparse
+import csv
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.omdb import OMDB_DTYPES, OMDB_FIELDS, join_omdb_fields
+from utils.omdb_cache import normalize_title, normalize_year
+
+INDEX_DIR = "csvs/imdb_index"
+# title types a Letterboxd film can be, episodes and series are left out
+TITLE_TYPES = ["movie", "tvMovie", "short", "video", "tvSpecial"]
+CHUNKSIZE = 500_000
+
+NUMERIC_ARRAYS = ["keys", "runtime", "rating", "votes"]
+STRING_ARRAYS = ["genre", "director"]
+
+
+def index_key(title, year) -> int:
+    key = f"{normalize_title(title)}\t{normalize_year(year)}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def index_keys(titles, years):
+    return np.fromiter(
+        (index_key(title, year) for title, year in zip(titles, years)),
+        dtype=np.uint64,
+        count=len(titles),
+    )
+
+
+def read_tsv(path, usecols, chunksize: int = CHUNKSIZE):
+    # IMDb dumps use \N for missing values and no quoting at all
+    return pd.read_csv(
+        path,
+        sep="\t",
+        usecols=usecols,
+        dtype=str,
+        na_values="\\N",
+        keep_default_na=False,
+        quoting=csv.QUOTE_NONE,
+        chunksize=chunksize,
+    )
+
+
+def pack_strings(values):
+    # variable length strings as one utf-8 buffer plus offsets, both can be memory-mapped
+    encoded = [value.encode("utf-8") if isinstance(value, str) else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def unpack_string(offsets, data, position):
+    value = bytes(data[offsets[position] : offsets[position + 1]]).decode("utf-8")
+    return value or None
+
+
+def build_imdb_index(basics, ratings, crew, names=None, directory: str = INDEX_DIR):
+    """
+    Compile the IMDb dumps into `directory` and return the number of indexed keys.
+
+    Every film is indexed under its primary and its original title. When two films share
+    a normalized (title, year) the one with more votes wins. Without `names` the director
+    column is left empty.
+    """
+    films = pd.concat(
+        chunk[chunk["titleType"].isin(TITLE_TYPES) & chunk["startYear"].notna()]
+        for chunk in read_tsv(
+            basics,
+            [
+                "tconst",
+                "titleType",
+                "primaryTitle",
+                "originalTitle",
+                "startYear",
+                "runtimeMinutes",
+                "genres",
+            ],
+        )
+    ).drop(columns=["titleType"])
+    films = films.merge(
+        pd.concat(read_tsv(ratings, ["tconst", "averageRating", "numVotes"])),
+        how="left",
+        on="tconst",
+    ).merge(
+        pd.concat(read_tsv(crew, ["tconst", "directors"])), how="left", on="tconst"
+    )
+
+    films["Director"] = None
+    if names is not None:
+        directors = films["directors"].dropna().str.split(",").explode()
+        wanted = set(directors)
+        people = pd.concat(
+            chunk[chunk["nconst"].isin(wanted)]
+            for chunk in read_tsv(names, ["nconst", "primaryName"])
+        ).set_index("nconst")["primaryName"]
+        films["Director"] = (
+            directors.map(people).dropna().groupby(level=0).agg(", ".join)
+        )
+
+    # one row per title the film is known by
+    films = pd.concat(
+        [
+            films.rename(columns={"primaryTitle": "title"}),
+            films[films["originalTitle"] != films["primaryTitle"]].rename(
+                columns={"originalTitle": "title"}
+            ),
+        ]
+    )
+    films["key"] = index_keys(films["title"].to_numpy(), films["startYear"].to_numpy())
+    films["numVotes"] = pd.to_numeric(films["numVotes"]).fillna(-1).astype(np.int64)
+    films = films.sort_values(["key", "numVotes"], ascending=[True, False])
+    films = films.drop_duplicates(subset="key")
+
+    os.makedirs(directory, exist_ok=True)
+    arrays = {
+        "keys": films["key"].to_numpy(dtype=np.uint64),
+        "runtime": pd.to_numeric(films["runtimeMinutes"], errors="coerce")
+        .fillna(-1)
+        .to_numpy(dtype=np.int32),
+        "rating": pd.to_numeric(films["averageRating"]).to_numpy(dtype=np.float32),
+        "votes": films["numVotes"].to_numpy(dtype=np.int64),
+    }
+    # IMDb lists genres as "Crime,Drama", OMDB as "Crime, Drama"
+    genres = films["genres"].str.replace(",", ", ", regex=False)
+    for name, values in [("genre", genres), ("director", films["Director"])]:
+        arrays[f"{name}_offsets"], arrays[f"{name}_data"] = pack_strings(values)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+    return len(films)
+
+
+class IMDbIndex:
+    """Read-only view of an index built by `build_imdb_index`, all arrays are memory-mapped."""
+
+    def __init__(self, directory: str = INDEX_DIR):
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self.arrays = {name: load(name) for name in NUMERIC_ARRAYS}
+        for name in STRING_ARRAYS:
+            self.arrays[name] = (load(f"{name}_offsets"), load(f"{name}_data"))
+
+    @staticmethod
+    def exists(directory: str = INDEX_DIR) -> bool:
+        return os.path.exists(os.path.join(directory, "keys.npy"))
+
+    def __len__(self):
+        return len(self.arrays["keys"])
+
+    def lookup(self, titles, years):
+        """
+        Return the OMDB_FIELDS of every (title, year) found in the index, as a dataframe
+        indexed by the position of the film in the input. Films that are missing have no row.
+        """
+        keys = index_keys(titles, years)
+        stored = self.arrays["keys"]
+        if len(stored) == 0:
+            return pd.DataFrame(columns=OMDB_FIELDS).astype(OMDB_DTYPES)
+        positions = np.minimum(np.searchsorted(stored, keys), len(stored) - 1)
+        found = np.flatnonzero(stored[positions] == keys)
+        positions = positions[found]
+
+        runtime = self.arrays["runtime"][positions].astype(np.int64)
+        votes = self.arrays["votes"][positions]
+        omdb_df = pd.DataFrame(
+            {
+                "Runtime": pd.array(np.where(runtime < 0, None, runtime), dtype="Int64"),
+                "imdbRating": self.arrays["rating"][positions].astype(np.float64).round(1),
+                "imdbVotes": pd.array(np.where(votes < 0, None, votes), dtype="Int64"),
+            },
+            index=found,
+        )
+        for name, field in [("genre", "Genre"), ("director", "Director")]:
+            offsets, data = self.arrays[name]
+            omdb_df[field] = [
+                unpack_string(offsets, data, position) for position in positions
+            ]
+        # fields the dumps do not have stay empty text columns, like in OMDB responses
+        return omdb_df.reindex(columns=OMDB_FIELDS).astype(
+            {field: object for field in OMDB_FIELDS if field not in OMDB_DTYPES}
+        )
+
+
+def enrich_from_index(movie_df: pd.DataFrame, index: IMDbIndex):
+    """
+    Split `movie_df` into the movies the index knows, with their OMDB_FIELDS columns
+    filled in and typed like `enrich_movies` output, and the movies left for OMDB.
+    """
+    omdb_df = index.lookup(movie_df["Name"].to_numpy(), movie_df["Year"].to_numpy())
+    found = np.zeros(len(movie_df), dtype=bool)
+    found[omdb_df.index] = True
+    omdb_df.index = movie_df.index[omdb_df.index]
+    return join_omdb_fields(movie_df[found], omdb_df), movie_df[~found]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline IMDb index.")
+    parser.add_argument("--basics", required=True)
+    parser.add_argument("--ratings", required=True)
+    parser.add_argument("--crew", required=True)
+    parser.add_argument("--names")
+    parser.add_argument("--out", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    count = build_imdb_index(
+        args.basics, args.ratings, args.crew, names=args.names, directory=args.out
+    )
+    print(f"Indexed {count} titles into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+DESCRIPTION: Data preparation steps of the Letterboxd report that do not depend on Streamlit, so they can be reused and benchmarked on their own.
+"""
+
+
+import pandas as pd
+
+from utils.aggregations import rank_top_k
+
+# a film is identified by its name and release year, remakes share the name
+FILM_KEY = ["Name", "Year"]
+
+DIARY_COLUMNS = ["Date", "Name", "Year", "Letterboxd URI", "Rating", "Watched Date"]
+RATINGS_COLUMNS = ["Date", "Name", "Year", "Rating"]
+
+
+def load_exports(ratings_path, diary_path):
+    """Read and validate a ratings and a diary export, raises ValueError for other CSV files."""
+    ratings_df = pd.read_csv(ratings_path, encoding="utf-8", header=0)
+    diary_df = pd.read_csv(diary_path, encoding="utf-8", header=0)
+    for name, df, columns in [
+        ("ratings", ratings_df, RATINGS_COLUMNS),
+        ("diary", diary_df, DIARY_COLUMNS),
+    ]:
+        missing = set(columns) - set(df.columns)
+        if missing:
+            raise ValueError(
+                f"Not a Letterboxd {name} export, missing columns: {sorted(missing)}"
+            )
+    # keep the URI when present, it identifies a film across exports
+    ratings_columns = RATINGS_COLUMNS + [
+        column for column in ["Letterboxd URI"] if column in ratings_df.columns
+    ]
+    return ratings_df[ratings_columns], diary_df[DIARY_COLUMNS]
+
+
+def merge_diary(ratings_df: pd.DataFrame, diary_df: pd.DataFrame):
+    """
+    Attach diary watch dates to the ratings with a single hash join on (Name, Year).
+
+    Adds "Watched Date" (first watch), "Last Watched Date" and "Watch Count" so rewatches
+    are kept instead of collapsing onto whichever diary row came first. Films missing from
+    the diary get NaN dates and a count of 0.
+    """
+    # aggregate parsed dates, min/max on the raw strings falls back to slow object comparisons
+    watched = pd.to_datetime(diary_df["Watched Date"], format="%Y-%m-%d", errors="coerce")
+    watches = (
+        diary_df[FILM_KEY]
+        .assign(**{"Watched Date": watched})
+        .dropna(subset=["Watched Date"])
+        .groupby(FILM_KEY, sort=False)["Watched Date"]
+        .agg(["min", "max", "size"])
+        .rename(
+            columns={
+                "min": "Watched Date",
+                "max": "Last Watched Date",
+                "size": "Watch Count",
+            }
+        )
+    )
+    movie_df = ratings_df.drop(columns=watches.columns, errors="ignore").merge(
+        watches, how="left", left_on=FILM_KEY, right_index=True
+    )
+    movie_df["Watch Count"] = movie_df["Watch Count"].fillna(0).astype(int)
+    for column in ["Watched Date", "Last Watched Date"]:
+        movie_df[column] = movie_df[column].dt.strftime("%Y-%m-%d")
+    return movie_df
+
+
+def merge_exports(ratings_df: pd.DataFrame, diary_df: pd.DataFrame):
+    # join the diary watch dates onto the ratings by (Name, Year), counting rewatches
+    movie_df = merge_diary(ratings_df, diary_df)
+
+    # drop the Date column from movie_df
+    return movie_df.drop(columns=["Date"])
+
+
+def split_new_movies(movie_df: pd.DataFrame, stored_df: pd.DataFrame, fields):
+    """
+    Match an upload against a previously enriched dataset.
+
+    Rows are matched on "Letterboxd URI" when both frames have it, otherwise on
+    (Name, Year). Returns the matched rows with their stored `fields` attached, and the
+    rows that are new (or were never successfully enriched) and still need OMDB data.
+    Both keep the index of `movie_df`.
+    """
+    if "Letterboxd URI" in movie_df and "Letterboxd URI" in stored_df:
+        key = ["Letterboxd URI"]
+    else:
+        key = FILM_KEY
+
+    # a stored dataset from an older version may lack some fields, they are missing values
+    stored = stored_df.reindex(columns=key + list(fields)).dropna(subset=fields, how="all")
+    stored = stored.drop_duplicates(subset=key)
+    if "Year" in key:
+        stored = stored.astype({"Year": "Int64"})
+        movie_df = movie_df.astype({"Year": "Int64"})
+
+    # merge resets the index, carry the upload's own index through it
+    index_name = movie_df.index.name or "index"
+    merged = (
+        movie_df.drop(columns=fields, errors="ignore")
+        .reset_index()
+        .merge(stored, how="left", on=key, indicator=True)
+        .set_index(index_name)
+        .rename_axis(movie_df.index.name)
+    )
+    is_new = merged.pop("_merge") == "left_only"
+    return merged[~is_new], movie_df[is_new.values]
+
+
+# OMDB fields holding comma separated lists, e.g. "Crime, Drama"
+MULTI_VALUE_FIELDS = ["Genre", "Country", "Language"]
+
+
+def build_value_index(values: pd.Series):
+    """
+    Invert a comma separated column into {value: row positions}.
+
+    Every listed value is indexed, not just the first one, and lookups are exact so
+    "Drama" does not match "Docudrama".
+    """
+    exploded = pd.Series(values.to_numpy()).str.split(",").explode().str.strip()
+    exploded = exploded[exploded.notna() & (exploded != "")]
+    positions = exploded.index.to_numpy()
+    groups = exploded.groupby(exploded.to_numpy(), sort=False).indices
+    return {value: positions[rows] for value, rows in groups.items()}
+
+
+def build_multi_value_index(movie_df: pd.DataFrame):
+    return {field: build_value_index(movie_df[field]) for field in MULTI_VALUE_FIELDS}
+
+
+def value_counts(value_index: dict):
+    """Number of movies listing each value, most common first."""
+    return pd.Series(
+        {value: len(rows) for value, rows in value_index.items()}, dtype="int64"
+    ).sort_values(ascending=False)
+
+
+def cleanup_movies(movie_df: pd.DataFrame):
+    # OMDB fields are already typed during enrichment, only presentation changes are left
+    movie_df = movie_df.rename(
+        columns={
+            "Name": "Movie",
+            "Rating": "Your Rating",
+            "imdbRating": "IMDB Rating",
+            "imdbVotes": "IMDB Votes",
+            "Runtime": "Runtime (min)",
+        }
+    )
+
+    # mutliply Rating by 2 to get a 10 point scale and convert to int
+    movie_df["Your Rating"] = (movie_df["Your Rating"] * 2).round().astype("Int64")
+    return movie_df
+
+
+# name -> (ranking keys, largest first) of every leaderboard table, the keys are also the columns shown
+LEADERBOARDS = {
+    "best_rating": (["Your Rating", "IMDB Rating", "IMDB Votes"], True),
+    "worst_rating": (["Your Rating", "IMDB Rating", "IMDB Votes"], False),
+    "longest_runtime": (["Runtime (min)"], True),
+    "shortest_runtime": (["Runtime (min)"], False),
+    "best_imdb_rating": (["IMDB Rating", "IMDB Votes"], True),
+    "worst_imdb_rating": (["IMDB Rating", "IMDB Votes"], False),
+    "most_popular": (["IMDB Votes"], True),
+    "highest_grossing": (["BoxOffice"], True),
+    "lowest_grossing": (["BoxOffice"], False),
+}
+
+
+# boards that only rank movies with a box office, a movie without one is not the lowest grossing
+GROSSING_BOARDS = ["highest_grossing", "lowest_grossing"]
+
+
+def rank_leaderboards(movie_df: pd.DataFrame):
+    # every top 10 / bottom 10 table in one pass, the report sections only display them
+    boards = {
+        name: (by, largest, ["Movie"] + by) for name, (by, largest) in LEADERBOARDS.items()
+    }
+    grossing = {name: boards.pop(name) for name in GROSSING_BOARDS}
+    leaderboards = rank_top_k(movie_df, boards, k=10)
+    leaderboards.update(
+        rank_top_k(movie_df.dropna(subset=["BoxOffice"]), grossing, k=10)
+    )
+    return {name: leaderboards[name].set_index("Movie") for name in LEADERBOARDS}
+
+
+def highlight_movies(movie_df: pd.DataFrame):
+    # pick every movie shown in the highlight sections once, so their posters can be resolved together
+    by_date = movie_df.dropna(subset=["Watched Date"]).sort_values(by=["Watched Date"])
+    by_runtime = movie_df.dropna(subset=["Runtime (min)"]).sort_values(
+        by=["Runtime (min)"]
+    )
+    by_year = movie_df.dropna(subset=["Year"]).sort_values(by=["Year"])
+    highlights = {}
+    if not by_date.empty:
+        highlights["first"], highlights["last"] = by_date.iloc[0], by_date.iloc[-1]
+    if not by_runtime.empty:
+        highlights["shortest"] = by_runtime.iloc[0]
+        highlights["longest"] = by_runtime.iloc[-1]
+    if not by_year.empty:
+        highlights["oldest"] = by_year.iloc[0]
+    return highlights
+
+
+def director_counts(movie_df: pd.DataFrame):
+    return (
+        movie_df["Director"]
+        .value_counts()
+        .rename_axis("Director")
+        .rename("Number of Movies Watched")
+        .to_frame()
+    )
+
+
+def watch_totals(movie_df: pd.DataFrame):
+    """Movie count, total and average runtime in minutes, and the average of your ratings."""
+    # as floats, so a library without runtimes or ratings averages to NaN instead of <NA>
+    runtime = movie_df["Runtime (min)"].astype("float64")
+    return {
+        "movies": len(movie_df),
+        "minutes": runtime.sum(),
+        "average_runtime": runtime.mean(),
+        "average_rating": round(movie_df["Your Rating"].astype("float64").mean(), 2),
+    }
@@ -0,0 +1,292 @@
+"""
+DESCRIPTION: Memoization of report sections across Streamlit reruns. A section is a function that computes something from the uploaded data and draws it with `st`. The first call records every Streamlit call the section makes (with the computed dataframes and figures as arguments), later calls with the same inputs replay the recording instead of recomputing. Inputs are keyed by a content hash, so any session uploading the same data shares the entries, and the recordings live in one process wide LRU bounded by their size in bytes.
+"""
+
+
+import hashlib
+import marshal
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+from pandas.core.arrays.masked import BaseMaskedArray
+from streamlit.delta_generator import DeltaGenerator
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def content_hash(value) -> str:
+    """Hash the content of a section argument, dataframes included."""
+    digest = hashlib.sha1()
+    _update_hash(digest, value)
+    return digest.hexdigest()
+
+
+def _column_bytes(column: pd.Series) -> bytes:
+    # raw buffers where pandas has them, hash_pandas_object is slow on nullable columns
+    values = column.array
+    if isinstance(values, BaseMaskedArray):
+        return values._data.tobytes() + values._mask.tobytes()
+    if isinstance(values, pd.Categorical):
+        categories = pd.util.hash_pandas_object(values.categories, index=False)
+        return categories.to_numpy().tobytes() + values.codes.tobytes()
+    if isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufcmM":
+        return np.ascontiguousarray(column.to_numpy()).tobytes()
+    return pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes()
+
+
+def _frame_hash(frame) -> bytes:
+    """
+    Hash of the values, index, column names and dtypes of a frame.
+
+    Computed on every call, never remembered per object: a frame changed in place
+    between two sections must not replay the first section's output.
+    """
+    if isinstance(frame, pd.Series):
+        signature = repr(("series", frame.name, str(frame.dtype), frame.shape))
+        columns = [frame]
+    else:
+        signature = repr(
+            (frame.shape, [(name, str(dtype)) for name, dtype in frame.dtypes.items()])
+        )
+        columns = [column for _, column in frame.items()]
+    digest = hashlib.sha1(signature.encode())
+    if isinstance(frame.index, pd.RangeIndex):
+        digest.update(repr(frame.index).encode())
+    else:
+        digest.update(pd.util.hash_pandas_object(frame.index).to_numpy().tobytes())
+    for column in columns:
+        digest.update(_column_bytes(column))
+    return digest.digest()
+
+
+def _update_hash(digest, value):
+    digest.update(type(value).__name__.encode())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(_frame_hash(value))
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(str(len(value)).encode())
+        for key, item in value.items():
+            _update_hash(digest, key)
+            _update_hash(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update_hash(digest, item)
+    else:
+        digest.update(pickle.dumps(value))
+
+
+def sizeof(value) -> int:
+    # rough size of what a recording keeps alive
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(sizeof(key) + sizeof(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(item) for item in value)
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU that evicts the least recently used entries once `max_bytes` is exceeded."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size: int):
+        with self.lock:
+            if key in self.entries:
+                self.total -= self.entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.total += size
+            while self.total > self.max_bytes:
+                self.total -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total = 0
+
+
+# shared by every page and session, the keys already tell datasets apart
+section_cache = LRUCache()
+
+
+class _Ref:
+    """Placeholder for a Streamlit object created while recording, resolved on replay."""
+
+    __slots__ = ["ref"]
+
+    def __init__(self, ref):
+        self.ref = ref
+
+
+class _Recorder:
+    def __init__(self, root):
+        self.objects = [root]
+        self.ops = []
+
+    def wrap(self, value):
+        # Streamlit containers come back as proxies so calls on them are recorded too
+        if isinstance(value, DeltaGenerator):
+            self.objects.append(value)
+            return _Proxy(self, len(self.objects) - 1)
+        if isinstance(value, (list, tuple)) and any(
+            isinstance(item, DeltaGenerator) for item in value
+        ):
+            return type(value)(self.wrap(item) for item in value)
+        return value
+
+    def call(self, ref, name, args, kwargs):
+        target = getattr(self.objects[ref], name)
+        result = target(*_unwrap(args), **_unwrap(kwargs))
+        wrapped = self.wrap(result)
+        self.ops.append((ref, name, _to_refs(args), _to_refs(kwargs), _to_refs(wrapped)))
+        return wrapped
+
+
+class _Proxy:
+    """Stands in for `st` (or a container) while a section is recorded."""
+
+    def __init__(self, recorder: _Recorder, ref: int):
+        object.__setattr__(self, "_recorder", recorder)
+        object.__setattr__(self, "_ref", ref)
+
+    def __getattr__(self, name):
+        recorder, ref = self._recorder, self._ref
+        value = getattr(recorder.objects[ref], name)
+        if isinstance(value, DeltaGenerator):
+            # e.g. st.sidebar
+            proxy = recorder.wrap(value)
+            recorder.ops.append((ref, name, None, None, _to_refs(proxy)))
+            return proxy
+        if callable(value):
+            return lambda *args, **kwargs: recorder.call(ref, name, args, kwargs)
+        return value
+
+    def __enter__(self):
+        self._recorder.call(self._ref, "__enter__", (), {})
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._recorder.call(self._ref, "__exit__", exc_info, {})
+
+
+def _unwrap(value):
+    if isinstance(value, _Proxy):
+        return value._recorder.objects[value._ref]
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _unwrap(item) for key, item in value.items()}
+    return value
+
+
+def _to_refs(value):
+    if isinstance(value, _Proxy):
+        return _Ref(value._ref)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_to_refs(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _to_refs(item) for key, item in value.items()}
+    return value
+
+
+def _resolve(value, objects):
+    if isinstance(value, _Ref):
+        return objects[value.ref]
+    if isinstance(value, (list, tuple)):
+        return type(value)(_resolve(item, objects) for item in value)
+    if isinstance(value, dict):
+        return {key: _resolve(item, objects) for key, item in value.items()}
+    return value
+
+
+def _bind(value, result, objects):
+    # map the refs of a recorded result onto the objects returned by the replayed call
+    if isinstance(value, _Ref):
+        objects[value.ref] = result
+    elif isinstance(value, (list, tuple)):
+        for item, item_result in zip(value, result):
+            _bind(item, item_result, objects)
+
+
+def _replay(root, ops):
+    objects = {0: root}
+    for ref, name, args, kwargs, result in ops:
+        if args is None:
+            value = getattr(objects[ref], name)
+        else:
+            value = getattr(objects[ref], name)(
+                *_resolve(args, objects), **_resolve(kwargs, objects)
+            )
+        _bind(result, value, objects)
+
+
+def memoize_section(func):
+    """
+    Cache what a report section draws, keyed by the code of the section and a content
+    hash of its arguments.
+
+    On a miss the section runs normally while its Streamlit calls are recorded, on a hit
+    the recording is replayed and the section body is skipped. Only use it on sections
+    whose output depends on nothing but their arguments (no widgets, no session state).
+    """
+    code_hash = hashlib.sha1(marshal.dumps(func.__code__)).hexdigest()
+    module = func.__globals__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        st = module["st"]
+        if isinstance(st, _Proxy):
+            # called from a section that is being recorded, it records this call too
+            return func(*args, **kwargs)
+
+        key = (func.__qualname__, code_hash, content_hash((args, kwargs)))
+        entry = section_cache.get(key)
+        if entry is not None:
+            ops, result = entry
+            _replay(st, ops)
+            return result
+
+        recorder = _Recorder(st)
+        module["st"] = _Proxy(recorder, 0)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            module["st"] = st
+        size = sizeof([op[2:4] for op in recorder.ops]) + sizeof(result)
+        section_cache.set(key, (recorder.ops, result), size)
+        return result
+
+    return wrapper
@@ -0,0 +1,388 @@
+"""
+DESCRIPTION: OMDB client shared by the Letterboxd pages. Lookups read through the persistent OMDBCache, run on a thread pool, are throttled by a token bucket and retried with exponential backoff so a full ratings export is enriched in parallel instead of one blocking request at a time. Requests can be spread over several API keys with a KeyScheduler.
+
+API KEY: OMDB
+"""
+
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from utils.http_session import make_session
+from utils.omdb_cache import OMDBCache, normalize_title, normalize_year
+from utils.omdb_quota import (
+    INVALID_KEY,
+    KEY_ERRORS,
+    LIMIT_REACHED,
+    NO_KEY,
+    KeyScheduler,
+    QuotaExhausted,
+    QuotaLedger,
+)
+
+OMDB_URL = "http://www.omdbapi.com/"
+
+# Runtime, Genre, Director, Rated, Language, Country, imdbRating, imdbVotes, BoxOffice, Poster
+OMDB_FIELDS = [
+    "Runtime",
+    "Genre",
+    "Director",
+    "Rated",
+    "Language",
+    "Country",
+    "imdbRating",
+    "imdbVotes",
+    "BoxOffice",
+    "Poster",
+]
+
+# numeric OMDB fields are parsed as soon as a response arrives, missing values become <NA>
+OMDB_DTYPES = {
+    "Runtime": "Int64",
+    "imdbRating": "float64",
+    "imdbVotes": "Int64",
+    "BoxOffice": "Int64",
+}
+ENRICHED_DTYPES = {"Year": "Int64", **OMDB_DTYPES}
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10  # requests per second, shared by all workers
+DEFAULT_TIMEOUT = 10  # seconds per request
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+# failures worth another attempt: network errors, 429s and 5xxs, truncated JSON
+RETRIED_ERRORS = (requests.ConnectionError, requests.Timeout, requests.HTTPError, ValueError)
+
+# the only error that describes the movie rather than the key, so it is safe to cache
+NOT_FOUND = "Movie not found!"
+
+# well known movie the API keys are verified with
+PROBE_MOVIE = ("Reservoir Dogs", 1992)
+
+
+class OMDBError(Exception):
+    """OMDB answered, but with `"Response": "False"` (movie not found, bad key, quota reached...)."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket. `acquire` blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        # a bucket must hold at least one whole token, or acquire would never return
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RequestCoalescer:
+    """
+    Share one lookup between every request for the same key.
+
+    The first `run` for a key calls the function; concurrent and later runs for that key
+    wait on the same future and get its result or exception, so a (title, year) is looked
+    up at most once while the coalescer lives (one page run). Thread-safe.
+    """
+
+    def __init__(self):
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.calls = 0  # lookups that actually ran
+        self.saved = 0  # lookups answered by another one
+
+    def run(self, key, func, *args, **kwargs):
+        with self.lock:
+            future = self.futures.get(key)
+            owner = future is None
+            if owner:
+                future = self.futures[key] = Future()
+                self.calls += 1
+            else:
+                self.saved += 1
+        if owner:
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as error:
+                future.set_exception(error)
+        return future.result()
+
+
+class OMDBClient:
+    """
+    Everything the lookups of one run share: a pooled session, one token bucket over all
+    requests, a RequestCoalescer, and optionally the persistent `cache` and a `scheduler`
+    spreading the requests over several API keys (`api_key` is then ignored). Requests
+    are throttled to `rate` per second. Thread-safe, the enrichment and the poster
+    lookups of a run use the same client so they stay under one rate.
+    """
+
+    timeout = DEFAULT_TIMEOUT
+    retries = DEFAULT_RETRIES
+    backoff = DEFAULT_BACKOFF
+
+    def __init__(
+        self,
+        api_key=None,
+        cache: OMDBCache = None,
+        scheduler: KeyScheduler = None,
+        workers: int = DEFAULT_WORKERS,
+        rate: float = DEFAULT_RATE,
+    ):
+        self.api_key = api_key
+        self.cache = cache
+        self.scheduler = scheduler
+        self.workers = workers
+        self.session = make_session(workers)
+        self.limiter = TokenBucket(rate)
+        self.coalescer = RequestCoalescer()
+
+    def fetch(self, title, release_year):
+        """
+        Return the raw OMDB JSON for a title. Network errors, 429s and 5xxs are retried.
+
+        The cache is read first, and successful or "not found" answers are written back
+        to it. With a scheduler a key OMDB reports as used up is retired and the request
+        sent again on another one, until QuotaExhausted is raised. Repeated lookups of
+        the same normalized (title, year) share a single call.
+        """
+        key = (normalize_title(title), normalize_year(release_year))
+        return self.coalescer.run(key, self._fetch, title, release_year)
+
+    def _fetch(self, title, release_year):
+        if self.cache is not None:
+            data = self.cache.get(title, release_year)
+            if data is not None:
+                return _check_response(data)
+
+        while True:
+            api_key, data = with_retries(
+                lambda: self._send(title, release_year), self.retries, self.backoff
+            )
+            if self.scheduler is not None and data.get("Error") in KEY_ERRORS:
+                # this key is done for today, the request goes out again on the next one
+                self.scheduler.mark_exhausted(api_key)
+                continue
+            if self.cache is not None and (
+                data.get("Response") == "True" or data.get("Error") == NOT_FOUND
+            ):
+                self.cache.set(title, release_year, data)
+            return _check_response(data)
+
+    def _send(self, title, release_year):
+        # every attempt takes a token and, with a scheduler, a request of a key's quota
+        api_key = self.api_key if self.scheduler is None else self.scheduler.acquire()
+        self.limiter.acquire()
+        return api_key, request_omdb(self.session, title, release_year, api_key, self.timeout)
+
+
+def request_omdb(session, title, release_year, api_key, timeout: float = DEFAULT_TIMEOUT):
+    """Send one OMDB request, 429s and 5xxs raise requests.HTTPError and a body that is not JSON ValueError."""
+    parameters = {"apikey": api_key, "t": title, "y": release_year}
+    response = session.get(OMDB_URL, params=parameters, timeout=timeout)
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    return response.json()
+
+
+def with_retries(send, retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF):
+    """Return `send()`, retrying RETRIED_ERRORS up to `retries` times with exponential backoff."""
+    attempt = 0
+    while True:
+        try:
+            return send()
+        except RETRIED_ERRORS:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2**attempt)
+            attempt += 1
+
+
+def _check_response(data):
+    if data.get("Response") == "False":
+        raise OMDBError(data.get("Error", "Unknown OMDB error"))
+    return data
+
+
+def _to_number(value: str, cast):
+    # "142 min", "8.3", "1,234,567", "$12,345,678"
+    try:
+        return cast(value.split(" ")[0].replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_omdb_value(field, value):
+    if value is None or value in ("N/A", "None", ""):
+        return None
+    if field == "imdbRating":
+        return _to_number(value, float)
+    if field in OMDB_DTYPES:
+        return _to_number(value, int)
+    return value
+
+
+def parse_omdb_response(response: dict):
+    return {field: parse_omdb_value(field, response.get(field)) for field in OMDB_FIELDS}
+
+
+def parse_omdb_columns(movie_df: pd.DataFrame):
+    """Type the OMDB columns of a checkpoint written before responses were parsed on arrival."""
+    for field in OMDB_FIELDS:
+        if field not in movie_df:
+            # older checkpoints did not store every field, e.g. Poster
+            movie_df[field] = None
+        elif movie_df[field].dtype == object:
+            movie_df[field] = movie_df[field].map(
+                lambda value, field=field: parse_omdb_value(field, value)
+                if isinstance(value, str)
+                else None
+            )
+    movie_df["Year"] = pd.to_numeric(movie_df["Year"], errors="coerce")
+    return movie_df.astype(ENRICHED_DTYPES)
+
+
+def get_omdb_data(title, release_year, client: OMDBClient):
+    return parse_omdb_response(client.fetch(title, int(release_year)))
+
+
+def get_movie_poster_url(movie, year, client: OMDBClient):
+    return client.fetch(movie, int(year))["Poster"]
+
+
+def resolve_posters(movies, client: OMDBClient):
+    """
+    Resolve the poster URL of every (title, year) in `movies` concurrently, on the
+    client's workers and under its rate. Failed lookups map to None.
+    """
+    movies = list(dict.fromkeys(movies))
+    if not movies:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(client.workers, len(movies))) as pool:
+        futures = {
+            movie: pool.submit(get_movie_poster_url, *movie, client) for movie in movies
+        }
+    return {
+        movie: None if future.exception() else future.result()
+        for movie, future in futures.items()
+    }
+
+
+def verify_api_key(
+    api_key,
+    cache: OMDBCache = None,
+    ledger: QuotaLedger = None,
+    retries: int = 1,
+    backoff: float = DEFAULT_BACKOFF,
+) -> bool:
+    """
+    Probe OMDB with a well known movie to check that the key works.
+
+    The probe always hits the network for a key that has not been verified recently (a
+    cached response says nothing about the key), but its answer is stored so the movie
+    itself is never fetched again. Every request sent is counted in `ledger` when one is
+    given. Returns False only when OMDB rejects the key. When OMDB cannot be reached or
+    gives no verdict, requests.RequestException or OMDBError is raised instead, so a
+    network error is never mistaken for a bad key.
+    """
+    if cache is not None and cache.is_verified_key(api_key):
+        return True
+
+    def send():
+        if ledger is not None:
+            ledger.record(api_key)
+        return request_omdb(requests, *PROBE_MOVIE, api_key)
+
+    try:
+        data = with_retries(send, retries, backoff)
+    except (requests.RequestException, ValueError) as error:
+        raise requests.RequestException(f"OMDB did not answer: {error}") from error
+
+    if data.get("Response") == "False":
+        return key_verdict(data.get("Error", "Unknown OMDB error"), api_key, ledger)
+    if cache is not None:
+        cache.set(*PROBE_MOVIE, data)
+        cache.mark_verified_key(api_key)
+    return True
+
+
+def key_verdict(error: str, api_key, ledger: QuotaLedger = None) -> bool:
+    """Whether the OMDB `error` answered to a key means it is valid, OMDBError when it does not say."""
+    if error in (INVALID_KEY, NO_KEY):
+        return False
+    if error == LIMIT_REACHED:
+        # a key that reached its limit today is still a valid key
+        if ledger is not None:
+            ledger.mark_exhausted(api_key)
+        return True
+    if error == NOT_FOUND:
+        # OMDB accepted the key, the answer is just not a movie
+        return True
+    raise OMDBError(error)
+
+
+def enrich_movies(movie_df: pd.DataFrame, client: OMDBClient, on_result=None):
+    """
+    Add the OMDB_FIELDS columns to `movie_df` with one lookup per row on the client's
+    workers. Numeric fields and Year come back typed according to ENRICHED_DTYPES.
+
+    `on_result(done, name, year, error)` is called from the calling thread as each lookup
+    finishes, so it is safe to write Streamlit elements from it. Movies in the client's
+    cache cost no request, and rows repeating a (title, year) share one lookup. Once
+    every key of the client's scheduler is used up the remaining movies are left pending
+    instead of skipped, their OMDB columns stay empty so a later run picks them up
+    again. Returns the enriched dataframe, the skipped and the pending movie names.
+    """
+    skipped_movies = []
+    pending_movies = []
+    rows = {}
+
+    with ThreadPoolExecutor(max_workers=client.workers) as pool:
+        futures = {
+            pool.submit(get_omdb_data, name, year, client): (index, name, year)
+            for index, name, year in zip(
+                movie_df.index, movie_df["Name"], movie_df["Year"]
+            )
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            index, name, year = futures[future]
+            error = future.exception()
+            if error is None:
+                rows[index] = future.result()
+            elif isinstance(error, QuotaExhausted):
+                pending_movies.append(name)
+            else:
+                skipped_movies.append(name)
+            if on_result is not None:
+                on_result(done, name, year, error)
+
+    omdb_df = pd.DataFrame.from_dict(rows, orient="index", columns=OMDB_FIELDS)
+    return join_omdb_fields(movie_df, omdb_df), skipped_movies, pending_movies
+
+
+def join_omdb_fields(movie_df: pd.DataFrame, omdb_df: pd.DataFrame):
+    """Replace the OMDB_FIELDS of `movie_df` with `omdb_df` (same index), typed according to ENRICHED_DTYPES."""
+    movie_df = movie_df.drop(columns=OMDB_FIELDS, errors="ignore").join(
+        omdb_df.astype(OMDB_DTYPES)
+    )
+    movie_df["Year"] = pd.to_numeric(movie_df["Year"], errors="coerce").astype("Int64")
+    return movie_df
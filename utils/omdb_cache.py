@@ -0,0 +1,142 @@
+"""
+DESCRIPTION: Persistent SQLite cache of raw OMDB responses keyed by normalized (title, year). It is shared by every session and CACHE_ID so a movie that was looked up once costs no network and no API quota again until its entry expires.
+"""
+
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import unicodedata
+from contextlib import closing
+
+DEFAULT_CACHE_PATH = "csvs/omdb_cache.sqlite3"
+DEFAULT_TTL = 30 * 24 * 60 * 60  # OMDB ratings and votes drift, refresh monthly
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # raw JSON kept before least recently used entries go
+KEY_TTL = 24 * 60 * 60  # how long a verified API key is trusted without a probe
+
+
+def normalize_title(title) -> str:
+    title = unicodedata.normalize("NFKC", str(title))
+    return " ".join(title.casefold().split())
+
+
+def normalize_year(year) -> str:
+    try:
+        return str(int(float(year)))
+    except (TypeError, ValueError):
+        return ""
+
+
+def hash_api_key(api_key) -> str:
+    # API keys are never written to disk, only their digest
+    return hashlib.sha256(str(api_key).encode("utf-8")).hexdigest()
+
+
+class OMDBCache:
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    title TEXT NOT NULL,
+                    year TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (title, year)
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS verified_keys (
+                    key_hash TEXT PRIMARY KEY,
+                    verified_at REAL NOT NULL
+                )"""
+            )
+
+    def _connect(self):
+        # one short-lived connection per call keeps the cache safe to use from worker threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, title, year):
+        """Return the cached OMDB JSON for (title, year), or None on a miss or expired entry."""
+        key = (normalize_title(title), normalize_year(year))
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT response, fetched_at FROM responses WHERE title = ? AND year = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE title = ? AND year = ?", key)
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE title = ? AND year = ?",
+                (now, *key),
+            )
+        return json.loads(row[0])
+
+    def set(self, title, year, response: dict):
+        payload = json.dumps(response, separators=(",", ":"))
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_title(title),
+                    normalize_year(year),
+                    payload,
+                    len(payload),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE fetched_at < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # drop the least recently used entries until the cache fits again
+        conn.execute(
+            """DELETE FROM responses WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, size, SUM(size) OVER (ORDER BY accessed_at, rowid) AS running
+                    FROM responses
+                ) WHERE running - size < ?
+            )""",
+            (total - self.max_bytes,),
+        )
+
+    def is_verified_key(self, api_key) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT verified_at FROM verified_keys WHERE key_hash = ?",
+                (hash_api_key(api_key),),
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= KEY_TTL
+
+    def mark_verified_key(self, api_key):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO verified_keys VALUES (?, ?)",
+                (hash_api_key(api_key), time.time()),
+            )
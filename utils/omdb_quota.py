@@ -0,0 +1,132 @@
+"""
+DESCRIPTION: Daily OMDB quota bookkeeping for enriching libraries larger than one key allows. A persisted per-key ledger counts the requests every key has sent today, and a KeyScheduler spreads requests across the keys that still have quota so a job can run on several keys at once and pause when they are all used up.
+"""
+
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+from utils.omdb_cache import DEFAULT_CACHE_PATH, hash_api_key
+
+DAILY_LIMIT = 1000  # requests per key per day on the free OMDB plan
+
+# errors after which a key must not be used again today
+LIMIT_REACHED = "Request limit reached!"
+INVALID_KEY = "Invalid API key!"
+NO_KEY = "No API key provided."
+KEY_ERRORS = {LIMIT_REACHED, INVALID_KEY, NO_KEY}
+
+
+class QuotaExhausted(Exception):
+    """Every API key has used its daily quota, the job has to wait for the reset."""
+
+
+def quota_day(now: float = None) -> str:
+    # OMDB quotas are counted per day, the ledger uses UTC days
+    return datetime.fromtimestamp(now or time.time(), timezone.utc).strftime("%Y-%m-%d")
+
+
+def next_reset(now: float = None) -> datetime:
+    today = datetime.fromtimestamp(now or time.time(), timezone.utc).date()
+    return datetime.combine(today + timedelta(days=1), datetime.min.time(), timezone.utc)
+
+
+class QuotaLedger:
+    """
+    Requests sent per (API key, day), stored next to the OMDB response cache.
+
+    Keys are only stored as their digest, like in OMDBCache. Rows of past days are
+    dropped as new ones are written.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, limit: int = DAILY_LIMIT):
+        self.path = path
+        self.limit = limit
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS key_usage (
+                    key_hash TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    used INTEGER NOT NULL,
+                    PRIMARY KEY (key_hash, day)
+                )"""
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def used(self, api_key) -> int:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT used FROM key_usage WHERE key_hash = ? AND day = ?",
+                (hash_api_key(api_key), quota_day()),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self, api_key) -> int:
+        return max(self.limit - self.used(api_key), 0)
+
+    def record(self, api_key, requests: int = 1):
+        day = quota_day()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT INTO key_usage VALUES (?, ?, ?)
+                ON CONFLICT (key_hash, day) DO UPDATE SET used = used + excluded.used""",
+                (hash_api_key(api_key), day, requests),
+            )
+            conn.execute("DELETE FROM key_usage WHERE day < ?", (day,))
+
+    def mark_exhausted(self, api_key):
+        # OMDB knows better than the ledger, e.g. when the key was also used elsewhere
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO key_usage VALUES (?, ?, ?)",
+                (hash_api_key(api_key), quota_day(), self.limit),
+            )
+
+
+class KeyScheduler:
+    """
+    Hand out API keys round robin among the ones with quota left today.
+
+    `acquire` reserves one request on the returned key in the ledger before it is sent,
+    and raises QuotaExhausted once no key has quota left. Thread-safe.
+    """
+
+    def __init__(self, api_keys, ledger: QuotaLedger):
+        self.ledger = ledger
+        self.lock = threading.Lock()
+        # read the ledger once, after that the scheduler keeps its own count
+        self.remaining = {key: ledger.remaining(key) for key in dict.fromkeys(api_keys)}
+        self.turn = 0
+
+    @property
+    def keys(self):
+        return list(self.remaining)
+
+    def total_remaining(self) -> int:
+        return sum(self.remaining.values())
+
+    def acquire(self):
+        with self.lock:
+            available = [key for key, left in self.remaining.items() if left > 0]
+            if not available:
+                raise QuotaExhausted(
+                    f"All {len(self.remaining)} OMDB API keys have reached their daily limit."
+                )
+            key = available[self.turn % len(available)]
+            self.turn += 1
+            self.remaining[key] -= 1
+        self.ledger.record(key)
+        return key
+
+    def mark_exhausted(self, api_key):
+        with self.lock:
+            self.remaining[api_key] = 0
+        self.ledger.mark_exhausted(api_key)
@@ -0,0 +1,74 @@
+"""
+DESCRIPTION: Progress bookkeeping for long per-item jobs such as the OMDB enrichment. Every result is logged in memory, but the page is only redrawn a few times per second, so a run over thousands of movies sends a handful of updates to the browser instead of one element per movie.
+"""
+
+
+import time
+
+DEFAULT_UPDATES_PER_SECOND = 4
+
+
+class ThrottledProgress:
+    """
+    Count finished items and call `on_update(progress)` at most `updates_per_second`
+    times per second, and always for the last item. The full per-item log is kept for
+    `log_text`.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        on_update,
+        updates_per_second: float = DEFAULT_UPDATES_PER_SECOND,
+        clock=time.monotonic,
+    ):
+        self.total = total
+        self.on_update = on_update
+        self.interval = 1 / updates_per_second
+        self.clock = clock
+        self.started = clock()
+        self.last_update = None
+        self.done = 0
+        self.failed = 0
+        self.log = []
+
+    def record(self, line: str, failed: bool = False):
+        self.done += 1
+        self.failed += failed
+        self.log.append(f"{self.done}. {line}")
+
+        now = self.clock()
+        if (
+            self.done == self.total
+            or self.last_update is None
+            or now - self.last_update >= self.interval
+        ):
+            self.last_update = now
+            self.on_update(self)
+
+    @property
+    def fraction(self) -> float:
+        return min(self.done / self.total, 1.0) if self.total else 1.0
+
+    @property
+    def rate(self) -> float:
+        # items per second since the job started
+        elapsed = self.clock() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        # seconds left at the current rate, None until there is a rate
+        rate = self.rate
+        return (self.total - self.done) / rate if rate else None
+
+    def status(self, unit: str = "items") -> str:
+        eta = self.eta
+        eta = "--" if eta is None else time.strftime("%H:%M:%S", time.gmtime(eta))
+        return (
+            f"{self.done}/{self.total} {unit} · {self.rate:.1f} {unit}/s"
+            f" · ETA {eta} · {self.failed} failed"
+        )
+
+    def log_text(self) -> str:
+        return "\n".join(self.log) + "\n"
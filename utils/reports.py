@@ -0,0 +1,372 @@
+"""
+DESCRIPTION: Headless report engine. Builds the aggregates and charts of the Goodreads, Letterboxd and Steam reports straight from the export CSVs, without Streamlit, and writes them as JSON (tables plus Plotly chart specs) or as a standalone HTML page. Many exports are processed in parallel on a process pool, so reports can be generated in bulk ahead of time.
+
+USAGE: python -m utils.reports goodreads|steam EXPORT.csv [EXPORT.csv ...] [--out reports] [--format json|html] [--workers N]
+       python -m utils.reports letterboxd [EXPORT_DIR ...] [--letterboxd-files RATINGS DIARY ...] [--omdb-key KEY ...]
+
+API KEY: OMDB, optional. Letterboxd movies come from the offline IMDb index and the OMDB cache first, without a key movies missing from both are reported as pending.
+"""
+
+
+import argparse
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import plotly.express as px
+
+from utils import goodreads, letterboxd, steam
+from utils.aggregations import bucket_long_tail
+from utils.cadence import cadence_charts, watch_cadence
+from utils.imdb_index import INDEX_DIR, IMDbIndex, enrich_from_index
+from utils.omdb import DEFAULT_WORKERS, OMDBClient, enrich_movies
+from utils.omdb_cache import DEFAULT_CACHE_PATH, OMDBCache
+from utils.omdb_quota import KeyScheduler, QuotaLedger
+
+OUT_DIR = "reports"
+FORMATS = ["json", "html"]
+
+
+def report_id(*paths) -> str:
+    # content hash of the exports, the same upload always maps to the same report file
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as export:
+            digest.update(export.read())
+    return digest.hexdigest()[:16]
+
+
+def count_table(counts: pd.Series, name: str):
+    return counts.rename_axis(name).reset_index(name="Count")
+
+
+def goodreads_report(path):
+    books_df = goodreads.load_books(path)
+    cube = goodreads.reading_cube(books_df)
+    tables = {
+        "books_per_year": goodreads.books_per_year(books_df),
+        "yearly_totals": goodreads.yearly_totals(cube).reset_index(),
+        "pages_per_month": goodreads.monthly_pages(cube),
+        "top_rated": goodreads.rated_books(books_df, 10).reset_index(),
+        "bottom_rated": goodreads.rated_books(books_df, 10, best=False).reset_index(),
+        "publishers": count_table(
+            bucket_long_tail(books_df["Publisher"].value_counts(), top_k=10), "Publisher"
+        ),
+        "bindings": count_table(
+            bucket_long_tail(books_df["Binding"].value_counts(), top_k=10), "Binding"
+        ),
+        "highlights": pd.DataFrame(goodreads.book_highlights(books_df))
+        .T.rename_axis("Highlight")
+        .reset_index(),
+        "ratings": goodreads.rating_counts(books_df),
+        "book_lengths": goodreads.page_range_counts(books_df),
+    }
+    charts = {
+        "books_per_year": px.bar(
+            tables["books_per_year"], x="Year", y="Count", color="Count"
+        ),
+        "pages_per_year": px.line(tables["yearly_totals"], x="Year", y="Number of Pages"),
+        "average_rating_per_year": px.line(
+            tables["yearly_totals"], x="Year", y="Average Rating"
+        ),
+        "pages_per_month": px.line(
+            tables["pages_per_month"].astype({"Year": str}),
+            x="Month",
+            y="Number of Pages",
+            color="Year",
+        ),
+        "publishers": px.pie(tables["publishers"], values="Count", names="Publisher"),
+        "bindings": px.pie(tables["bindings"], values="Count", names="Binding"),
+        "ratings": px.bar(tables["ratings"], x="Count", y="Rating", orientation="h"),
+        "publication_years": px.histogram(
+            goodreads.publication_years(books_df), x="Original Publication Year", nbins=20
+        ),
+        "book_lengths": px.pie(tables["book_lengths"], values="Count", names="Page Ranges"),
+    }
+    return {
+        "platform": "goodreads",
+        "stats": goodreads.library_totals(books_df),
+        "tables": tables,
+        "charts": charts,
+    }
+
+
+def steam_report(path):
+    games_df = steam.load_games(path)
+    genres = games_df["genres"].str.split(", ").explode()
+    tables = {
+        "most_played": games_df.nlargest(10, "hours")[["game", "hours", "released"]],
+        "genres": count_table(genres[genres != ""].value_counts().head(20), "Genre"),
+    }
+    charts = {
+        "most_played": px.bar(tables["most_played"], x="game", y="hours", color="hours"),
+        "genres": px.bar(tables["genres"], x="Genre", y="Count", color="Count"),
+    }
+    return {
+        "platform": "steam",
+        "stats": steam.library_totals(games_df),
+        "tables": tables,
+        "charts": charts,
+    }
+
+
+class EnrichOptions:
+    """Where the Letterboxd movies are looked up: the OMDB keys and workers, the cache and the IMDb index."""
+
+    def __init__(
+        self,
+        api_keys=(),
+        workers: int = DEFAULT_WORKERS,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        index_dir: str = INDEX_DIR,
+    ):
+        self.api_keys = list(api_keys)
+        self.workers = workers
+        self.cache_path = cache_path
+        self.index_dir = index_dir
+
+
+def enrich_headless(movie_df, options: EnrichOptions):
+    """
+    Fill in the OMDB fields of `movie_df` from the IMDb index, the OMDB cache and then
+    OMDB itself. Without API keys nothing is requested, movies missing from the index
+    and the cache are left pending. Returns the movies and the skipped and pending names.
+    """
+    local_df = None
+    if IMDbIndex.exists(options.index_dir):
+        local_df, movie_df = enrich_from_index(movie_df, IMDbIndex(options.index_dir))
+    # every process reads the shared ledger when it starts, keys that run out midway
+    # are still caught by OMDB answering LIMIT_REACHED
+    scheduler = KeyScheduler(options.api_keys, QuotaLedger(options.cache_path))
+    client = OMDBClient(
+        cache=OMDBCache(options.cache_path), scheduler=scheduler, workers=options.workers
+    )
+    movie_df, skipped, pending = enrich_movies(movie_df, client)
+    if local_df is not None:
+        movie_df = pd.concat([local_df, movie_df]).sort_index()
+    return movie_df, skipped, pending
+
+
+def letterboxd_report(ratings_path, diary_path, enrich: EnrichOptions = None):
+    ratings_df, diary_df = letterboxd.load_exports(ratings_path, diary_path)
+    movie_df, skipped, pending = enrich_headless(
+        letterboxd.merge_exports(ratings_df, diary_df), enrich or EnrichOptions()
+    )
+    movie_df = letterboxd.cleanup_movies(movie_df)
+    value_index = letterboxd.build_multi_value_index(movie_df)
+
+    tables = {
+        name: board.reset_index()
+        for name, board in letterboxd.rank_leaderboards(movie_df).items()
+    }
+    tables["directors"] = letterboxd.director_counts(movie_df).head(10).reset_index()
+    tables["genres"] = count_table(letterboxd.value_counts(value_index["Genre"]), "Genre")
+    for field, name in [("Country", "countries"), ("Language", "languages")]:
+        # values under 1% go to 'Others' like on the page
+        tables[name] = count_table(
+            bucket_long_tail(letterboxd.value_counts(value_index[field]), share=0.01),
+            field,
+        )
+    tables["parental_ratings"] = count_table(movie_df["Rated"].value_counts(), "Rated")
+    charts = {
+        name: px.pie(tables[name], values="Count", names=tables[name].columns[0])
+        for name in ["genres", "countries", "languages", "parental_ratings"]
+    }
+    cadence = watch_cadence(diary_df["Watched Date"])
+    for name in ["streaks", "gaps"]:
+        tables[name] = cadence[name]
+    for name in ["weekdays", "months"]:
+        tables[name] = cadence[name].rename_axis(name[:-1].title()).reset_index()
+    charts.update(cadence_charts(cadence))
+
+    stats = letterboxd.watch_totals(movie_df)
+    stats.update(
+        skipped=len(skipped),
+        pending=len(pending),
+        active_days=cadence["active_days"],
+        longest_streak=cadence["streaks"]["Days"].max(),
+        longest_gap=cadence["gaps"]["Days"].max(),
+    )
+    return {"platform": "letterboxd", "stats": stats, "tables": tables, "charts": charts}
+
+
+BUILDERS = {
+    "goodreads": goodreads_report,
+    "letterboxd": letterboxd_report,
+    "steam": steam_report,
+}
+
+
+def build_report(platform: str, paths, **options):
+    """
+    Build the report of one export: a dict with the platform, the `stats` scalars, the
+    `tables` dataframes and the `charts` Plotly figures. Letterboxd takes the ratings and
+    the diary export and the `letterboxd_report` options, the others a single CSV.
+    """
+    report = BUILDERS[platform](*paths, **options)
+    report["id"] = report_id(*paths)
+    report["sources"] = [os.path.basename(path) for path in paths]
+    return report
+
+
+def _json_default(value):
+    # numpy scalars in the stats
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def report_to_json(report) -> str:
+    return json.dumps(
+        {
+            "platform": report["platform"],
+            "id": report["id"],
+            "sources": report["sources"],
+            # NaN is not valid JSON
+            "stats": {
+                name: None if pd.isna(value) else value
+                for name, value in report["stats"].items()
+            },
+            "tables": {
+                name: json.loads(
+                    table.to_json(orient="split", date_format="iso", index=False)
+                )
+                for name, table in report["tables"].items()
+            },
+            # Plotly figure specs, render them with Plotly.newPlot(div, spec.data, spec.layout)
+            "charts": {
+                name: json.loads(fig.to_json()) for name, fig in report["charts"].items()
+            },
+        },
+        default=_json_default,
+    )
+
+
+def _title(name: str) -> str:
+    return name.replace("_", " ").title()
+
+
+def report_to_html(report) -> str:
+    stats = "".join(
+        f"<tr><th>{_title(name)}</th><td>{html.escape(str(value))}</td></tr>"
+        for name, value in report["stats"].items()
+    )
+    tables = "".join(
+        f"<h2>{_title(name)}</h2>{table.to_html(index=False, na_rep='')}"
+        for name, table in report["tables"].items()
+    )
+    # plotly.js is loaded once from the CDN, by the first chart
+    charts = "".join(
+        f"<h2>{_title(name)}</h2>"
+        + fig.to_html(full_html=False, include_plotlyjs="cdn" if position == 0 else False)
+        for position, (name, fig) in enumerate(report["charts"].items())
+    )
+    title = html.escape(f"{report['platform'].title()} report: {', '.join(report['sources'])}")
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title></head>"
+        f"<body><h1>{title}</h1><table>{stats}</table>{tables}{charts}</body></html>"
+    )
+
+
+def write_report(report, out_dir: str = OUT_DIR, fmt: str = "json") -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{report['platform']}-{report['id']}.{fmt}")
+    text = report_to_json(report) if fmt == "json" else report_to_html(report)
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(text)
+    return path
+
+
+def run_job(platform: str, paths, out_dir: str, fmt: str, options):
+    return write_report(build_report(platform, paths, **options), out_dir, fmt)
+
+
+def run_batch(jobs, out_dir: str = OUT_DIR, fmt: str = "json", workers: int = None, **options):
+    """
+    Build and write the report of every `(platform, paths)` job on a pool of `workers`
+    processes. Returns {job: written path or the exception it failed with}, one bad
+    export does not stop the others.
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                run_job,
+                platform,
+                paths,
+                out_dir,
+                fmt,
+                options if platform == "letterboxd" else {},
+            ): (platform, paths)
+            for platform, paths in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            error = future.exception()
+            results[job] = future.result() if error is None else error
+    return results
+
+
+def letterboxd_paths(export: str):
+    # an unzipped Letterboxd export directory, explicit files are given with --letterboxd-files
+    return (os.path.join(export, "ratings.csv"), os.path.join(export, "diary.csv"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reports from export CSVs.")
+    parser.add_argument("platform", choices=sorted(BUILDERS))
+    parser.add_argument("exports", nargs="*")
+    parser.add_argument(
+        "--letterboxd-files",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("RATINGS", "DIARY"),
+        help="a Letterboxd ratings and diary CSV, can be repeated",
+    )
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--omdb-key", action="append", default=[], dest="api_keys")
+    parser.add_argument("--omdb-workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    if args.platform == "letterboxd":
+        not_dirs = [export for export in args.exports if not os.path.isdir(export)]
+        if not_dirs:
+            parser.error(
+                f"not a Letterboxd export directory: {', '.join(not_dirs)}, "
+                "use --letterboxd-files RATINGS DIARY for separate files"
+            )
+        jobs = [("letterboxd", letterboxd_paths(export)) for export in args.exports]
+        jobs += [("letterboxd", tuple(files)) for files in args.letterboxd_files]
+    else:
+        if args.letterboxd_files:
+            parser.error("--letterboxd-files is only used with the letterboxd platform")
+        jobs = [(args.platform, (export,)) for export in args.exports]
+    if not jobs:
+        parser.error("no exports given")
+    results = run_batch(
+        jobs,
+        args.out,
+        args.format,
+        args.workers,
+        enrich=EnrichOptions(args.api_keys, args.omdb_workers),
+    )
+
+    failed = 0
+    for (platform, paths), result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"FAILED {', '.join(paths)}: {result.__class__.__name__}: {result}")
+        else:
+            print(f"{', '.join(paths)} -> {result}")
+    print(f"{len(results) - failed}/{len(results)} reports written to {args.out}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
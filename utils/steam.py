@@ -0,0 +1,114 @@
+"""
+DESCRIPTION: Data preparation and aggregates of the Steam report that do not depend on Streamlit, shared by the report page and the batch report engine.
+"""
+
+
+import pandas as pd
+
+# columns of the Steam Exporter CSV the report needs, every column after them is a genre tag
+COLUMNS = [
+    "game",
+    "id",
+    "hours",
+    "last_played",
+    "metascore",
+    "userscore",
+    "userscore_count",
+    "release_date",
+    "win",
+    "mac",
+    "linux",
+    "steam deck",
+]
+
+
+def clean_games(games_df: pd.DataFrame):
+    # drop id column
+    games_df = games_df.drop("id", axis=1)
+
+    # keep only year part of release_date
+    games_df["release_date"] = pd.to_datetime(games_df["release_date"])
+    games_df["release_date"] = games_df["release_date"].dt.year
+
+    # rename release_dated to released
+    games_df = games_df.rename(columns={"release_date": "released"})
+
+    # create empty column genres
+    games_df["genres"] = pd.Series(dtype=object)
+
+    # create empty platform columns
+    games_df["platforms"] = pd.Series(dtype=object)
+
+    # shift the second last column to first position
+    games_df.insert(0, "genres", games_df.pop("genres"))
+
+    #############
+    # GENRES
+    #############
+
+    # genre columns are columns 15-end
+    genre_columns = games_df.columns[14:]
+
+    # iterrate over each row
+    for index, row in games_df.iterrows():
+        to_add = [column for column in genre_columns if row[column] == "x"]
+        games_df.at[index, "genres"] = ", ".join(to_add)
+
+    # drop the genre_columns
+    games_df = games_df.drop(genre_columns, axis=1)
+
+    #############
+    # PLATFORMS
+    #############
+
+    # platforms columns are mac, linux, windows, steamdeck
+    my_platforms = ["mac", "linux", "win", "steam deck"]
+
+    for index, row in games_df.iterrows():
+        to_add = [column for column in my_platforms if row[column] == "x"]
+        # fill - where platforms is NA
+        if not to_add:
+            to_add.append("-")
+        games_df.at[index, "platforms"] = ", ".join(to_add)
+
+    # drop the platform columns
+    games_df = games_df.drop(my_platforms, axis=1)
+
+    # move game column to first place
+    games_df.insert(0, "game", games_df.pop("game"))
+
+    # drop other unnecessary columns
+    games_df = games_df.drop("wilsonscore", axis=1)
+    games_df = games_df.drop("sdbrating", axis=1)
+
+    # fill 0 where hours is NA
+    games_df["hours"] = games_df["hours"].fillna(0)
+
+    # fill "-" where metascore is NA
+    games_df["metascore"] = games_df["metascore"].fillna(pd.NA)
+
+    # # fill "-" where Userscore is NA
+    games_df["userscore"] = games_df["userscore"].fillna(pd.NA)
+    return games_df
+
+
+def load_games(path) -> pd.DataFrame:
+    """Read, validate and clean a Steam Exporter CSV, raises ValueError for other CSV files."""
+    games_df = pd.read_csv(path, encoding="utf-8", header=0)
+    missing = set(COLUMNS) - set(games_df.columns)
+    if missing:
+        raise ValueError(f"Not a Steam library export, missing columns: {sorted(missing)}")
+    return clean_games(games_df)
+
+
+def genre_list(games_df: pd.DataFrame):
+    genres = games_df["genres"].str.split(", ", expand=True).stack().unique()
+    return [genre for genre in genres if genre != ""]
+
+
+def library_totals(games_df: pd.DataFrame):
+    return {
+        "games": len(games_df.index),
+        "genres": len(genre_list(games_df)),
+        "hours": float(games_df["hours"].sum()),
+    }
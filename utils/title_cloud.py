@@ -0,0 +1,74 @@
+"""
+DESCRIPTION: Title word cloud of the Goodreads report. Titles are tokenized once into a word frequency table, and the cloud is laid out from that table with `generate_from_frequencies`. Layout is the slow part, so it runs on a background thread while the page draws its other sections, and the rendered images are kept in a process wide LRU keyed by a content hash of the table, so a rerun or another session with the same titles costs nothing. A preview lays the cloud out on a quarter size canvas, several times faster.
+"""
+
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+from wordcloud import WordCloud
+
+from utils.memo import LRUCache, content_hash
+
+# canvas of each render mode, a preview is laid out at a quarter of the size
+CLOUD_SIZES = {
+    False: {"width": 800, "height": 500, "max_font_size": 100},
+    True: {"width": 200, "height": 125, "max_font_size": 25},
+}
+MAX_WORDS = 100
+
+# rendered clouds of every session, a full size cloud is about 1.2 MB
+cloud_cache = LRUCache(64 * 1024 * 1024)
+_renderer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="title-cloud")
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def title_frequencies(titles: pd.Series) -> pd.Series:
+    """Word -> count over the titles, with the stopwords and plural folding of WordCloud."""
+    words = WordCloud().process_text(" ".join(titles.dropna()))
+    frequencies = pd.Series(words, name="Count", dtype="int64")
+    # stable, equal counts keep the order WordCloud would lay them out in
+    return frequencies.sort_values(ascending=False, kind="stable")
+
+
+def render_cloud(frequencies: pd.Series, preview: bool = False):
+    """RGB array of the cloud of a frequency table."""
+    wordcloud = WordCloud(
+        background_color="white",
+        max_words=MAX_WORDS,
+        random_state=42,
+        **CLOUD_SIZES[preview],
+    )
+    return wordcloud.generate_from_frequencies(frequencies.to_dict()).to_array()
+
+
+def submit_cloud(frequencies: pd.Series, preview: bool = False) -> Future:
+    """
+    Future of the rendered cloud, resolved at once when it is cached. Renders of the same
+    table already in progress are shared instead of started again.
+    """
+    key = (content_hash(frequencies), preview)
+    cloud = cloud_cache.get(key)
+    if cloud is not None:
+        future = Future()
+        future.set_result(cloud)
+        return future
+
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _renderer.submit(_render, key, frequencies, preview)
+            _pending[key] = future
+    return future
+
+
+def _render(key, frequencies, preview):
+    try:
+        cloud = render_cloud(frequencies, preview)
+        cloud_cache.set(key, cloud, cloud.nbytes)
+        return cloud
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)